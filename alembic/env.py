@@ -1,20 +1,15 @@
-import os
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
-from app.database import sync_engine 
+from app.database import get_sync_engine, get_sync_database_url
 from app.models import Base  
 
 config = context.config
 
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if DATABASE_URL.startswith("postgresql+asyncpg"):
-    SYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
-else:
-    SYNC_DATABASE_URL = DATABASE_URL
+SYNC_DATABASE_URL = get_sync_database_url().render_as_string(hide_password=False)
 
-config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
+config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL.replace("%", "%%"))
 
 
 if config.config_file_name is not None:
@@ -23,7 +18,7 @@ if config.config_file_name is not None:
 
 def run_migrations_online():
     """Run migrations in 'online' mode."""
-    with sync_engine.connect() as connection:  
+    with get_sync_engine().connect() as connection:
         context.configure(
             connection=connection,
             target_metadata=Base.metadata
@@ -0,0 +1,75 @@
+"""Add contact change feed
+
+Revision ID: 0a5c3c7bd41d
+Revises: 0aa78e3bc86b
+Create Date: 2026-10-16 23:40:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a5c3c7bd41d'
+down_revision: Union[str, None] = '0aa78e3bc86b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('change_seq', sa.BigInteger(),
+                                     server_default='0', nullable=False))
+    op.add_column('contacts', sa.Column('change_seq', sa.BigInteger(),
+                                        nullable=True))
+    # Number existing contacts 1..n per user in creation order, and start
+    # every user's counter after their last contact.
+    op.execute("""
+        UPDATE contacts SET change_seq = numbered.seq
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id ORDER BY created_at, id
+            ) AS seq
+            FROM contacts
+        ) AS numbered
+        WHERE contacts.id = numbered.id
+    """)
+    op.execute("""
+        UPDATE users SET change_seq = coalesce(
+            (SELECT max(change_seq) FROM contacts
+             WHERE contacts.user_id = users.id), 0
+        )
+    """)
+    op.alter_column('contacts', 'change_seq', nullable=False)
+
+    op.create_table('contact_tombstones',
+    sa.Column('contact_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('contact_id')
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_user_id_change_seq', 'contacts',
+                        ['user_id', 'change_seq'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contact_tombstones_user_id_change_seq',
+                        'contact_tombstones', ['user_id', 'change_seq'],
+                        unique=False, postgresql_concurrently=True,
+                        if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contact_tombstones_user_id_change_seq',
+                      table_name='contact_tombstones',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_user_id_change_seq', table_name='contacts',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_table('contact_tombstones')
+    op.drop_column('contacts', 'change_seq')
+    op.drop_column('users', 'change_seq')
@@ -0,0 +1,47 @@
+"""Add contacts birthday key
+
+Revision ID: 0aa78e3bc86b
+Revises: b561591d55b6
+Create Date: 2026-10-16 23:05:41.530927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0aa78e3bc86b'
+down_revision: Union[str, None] = 'b561591d55b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column is computed for every existing row when it is
+    # added, which backfills the key for contacts created before this revision.
+    op.add_column('contacts', sa.Column(
+        'birthday_key',
+        sa.Integer(),
+        sa.Computed(
+            "CAST(EXTRACT(MONTH FROM birthdate) * 100 "
+            "+ EXTRACT(DAY FROM birthdate) AS INTEGER)",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_user_id_birthday_key', 'contacts',
+                        ['user_id', 'birthday_key'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_user_id_birthday_key',
+                      table_name='contacts', postgresql_concurrently=True,
+                      if_exists=True)
+    op.drop_column('contacts', 'birthday_key')
@@ -0,0 +1,44 @@
+"""Add contacts user_id indexes
+
+Revision ID: 35b3dcc38090
+Revises: 0a5c3c7bd41d
+Create Date: 2026-10-16 23:58:03.914522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '35b3dcc38090'
+down_revision: Union[str, None] = '0a5c3c7bd41d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_contacts_user_id_created_at_id': ['user_id', 'created_at', 'id'],
+    'ix_contacts_user_id_last_name_first_name':
+        ['user_id', 'last_name', 'first_name'],
+    'ix_contacts_user_id_id': ['user_id', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps contacts writable while the indexes are built; it
+    # cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'contacts', columns, unique=False,
+                            postgresql_concurrently=True,
+                            if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='contacts',
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,56 @@
+"""Add contacts phone digits and lower-cased email
+
+Revision ID: 8a4996004915
+Revises: 35b3dcc38090
+Create Date: 2026-10-17 00:21:47.106283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4996004915'
+down_revision: Union[str, None] = '35b3dcc38090'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated columns are computed for every existing row when they
+    # are added, which backfills them for contacts created before this revision.
+    op.add_column('contacts', sa.Column(
+        'phone_digits',
+        sa.String(),
+        sa.Computed("regexp_replace(phone, '[^0-9]', '', 'g')", persisted=True),
+        nullable=True,
+    ))
+    op.add_column('contacts', sa.Column(
+        'email_lower',
+        sa.String(),
+        sa.Computed("lower(trim(email))", persisted=True),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_user_id_phone_digits', 'contacts',
+                        ['user_id', 'phone_digits'], unique=False,
+                        postgresql_ops={'phone_digits': 'text_pattern_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_user_id_email_lower', 'contacts',
+                        ['user_id', 'email_lower'], unique=False,
+                        postgresql_ops={'email_lower': 'text_pattern_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_user_id_email_lower', table_name='contacts',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_user_id_phone_digits', table_name='contacts',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('contacts', 'email_lower')
+    op.drop_column('contacts', 'phone_digits')
@@ -0,0 +1,46 @@
+"""Add contacts search vector
+
+Revision ID: b561591d55b6
+Revises: 6efc8194a1e2
+Create Date: 2026-10-16 22:50:12.104815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b561591d55b6'
+down_revision: Union[str, None] = '6efc8194a1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('simple', first_name || ' ' || last_name || ' ' "
+            "|| phone || ' ' || coalesce(email, ''))",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_search_vector', 'contacts',
+                        ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True,
+                        if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_search_vector', table_name='contacts',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('contacts', 'search_vector')
@@ -1,24 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import select
 from passlib.context import CryptContext
-from app.database import get_db
+from app.cache import CacheBackend, create_cache_backend
+from app.database import read_session
 from app.models import User
 
 load_dotenv(dotenv_path=".env")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 360
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+ADMIN_USERNAMES = {
+    name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()
+}
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# The first scheme hashes new passwords; hashes made with the others, or with
+# a lower cost than configured, are upgraded on the next successful login.
+# argon2 requires the argon2-cffi package.
+PASSWORD_SCHEMES = os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+pwd_context = CryptContext(
+    schemes=PASSWORD_SCHEMES,
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# bcrypt and argon2 release the GIL, so a small thread pool keeps hashing off
+# the event loop and caps how many hashes run at once.
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,6 +62,120 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """Hash a password on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor, get_password_hash, password
+    )
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hashing pool.
+    Returns: tuple of (is_valid, new_hash) where new_hash is set when the
+    stored hash uses a deprecated scheme or cost and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor,
+        pwd_context.verify_and_update,
+        plain_password,
+        hashed_password,
+    )
+
+
+class PrincipalCache:
+    """
+    Cache of authenticated users keyed by user id, so that get_current_user
+    does not query the users table on every request.
+    Entries expire after ttl seconds and are invalidated when the user row is
+    updated or deleted. The password hash is never cached.
+    """
+
+    fields = ("username", "email", "first_name", "last_name")
+    timestamps = ("created_at", "updated_at")
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: UUID) -> Optional[User]:
+        data = await self.backend.get(str(user_id))
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        values = json.loads(data)
+        for field in self.timestamps:
+            values[field] = datetime.fromisoformat(values[field])
+        return User(id=user_id, **values)
+
+    async def set(self, user: User) -> None:
+        values = {field: getattr(user, field) for field in self.fields}
+        for field in self.timestamps:
+            values[field] = getattr(user, field).isoformat()
+        await self.backend.set(str(user.id), json.dumps(values).encode(), self.ttl)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        await self.backend.delete(str(user_id))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    create_cache_backend("principal:", max_entries=PRINCIPAL_CACHE_SIZE),
+    ttl=PRINCIPAL_CACHE_TTL,
+)
+_pending_invalidations: set[asyncio.Task] = set()
+
+
+def invalidate_principal_on_commit(session: Session | AsyncSession, user_id: UUID):
+    """
+    Drop the cached principal once session commits. Changes made through the
+    unit of work are picked up automatically; Core UPDATE/DELETE statements
+    on users must call this.
+    """
+    session.info.setdefault("changed_principals", set()).add(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session, flush_context):
+    for instance in list(session.dirty) + list(session.deleted):
+        if isinstance(instance, User):
+            invalidate_principal_on_commit(session, instance.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    changed = session.info.pop("changed_principals", ())
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # synchronous session outside the app, e.g. a script
+        return
+
+    for user_id in changed:
+        task = loop.create_task(principal_cache.invalidate(user_id))
+        _pending_invalidations.add(task)
+        task.add_done_callback(_pending_invalidations.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_principals(session):
+    session.info.pop("changed_principals", None)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (
@@ -37,9 +185,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> User:
+def get_token_user_id(token: str = Depends(oauth2_scheme)) -> UUID:
     try:
         token = token.strip().replace('"', "")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -51,15 +197,10 @@ async def get_current_user(
                 detail="Invalid token: Missing user ID",
             )
 
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
+        return UUID(user_id)
 
-        return user
+    except HTTPException:
+        raise
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -71,8 +212,55 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: Malformed user ID",
+        )
+
+
+async def get_read_db(user_id: UUID = Depends(get_token_user_id)):
+    """
+    Session for safe GET handlers, routed to a read replica unless the
+    user wrote within the read-your-writes window.
+    """
+    async with read_session(user_id) as session:
+        yield session
+
+
+async def get_current_user(
+    user_id: UUID = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    try:
+        user = await principal_cache.get(user_id)
+        if user is not None:
+            return user
+
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+
+        await principal_cache.set(user)
+        return user
+
+    except HTTPException:
+        raise
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(e)}",
         )
+
+
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
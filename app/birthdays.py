@@ -0,0 +1,54 @@
+import calendar
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy.sql import Select, select, case, or_
+
+from app.models import Contact
+
+DEFAULT_BIRTHDAY_WINDOW_DAYS = 7
+MAX_BIRTHDAY_WINDOW_DAYS = 366
+
+
+def birthday_key(day: date) -> int:
+    """Month/day ordinal matching contacts.birthday_key, e.g. 1231 for Dec 31."""
+    return day.month * 100 + day.day
+
+
+def _window_end_key(day: date) -> int:
+    # In common years February 29 birthdays are celebrated on February 28.
+    if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+        return birthday_key(date(2000, 2, 29))
+    return birthday_key(day)
+
+
+def upcoming_birthdays_query(user_id: UUID, start: date, days: int) -> Select:
+    """
+    Select contacts whose birthday falls within [start, start + days],
+    ordered by the next occurrence.
+
+    The window is expressed as one or two ranges over birthday_key so the
+    (user_id, birthday_key) index can be range-scanned; a window crossing the
+    year end becomes key >= start OR key <= end.
+    """
+    start_key = birthday_key(start)
+    statement = select(Contact).where(Contact.user_id == user_id)
+
+    if days >= 365:
+        statement = statement.where(Contact.birthday_key.is_not(None))
+    else:
+        end_key = _window_end_key(start + timedelta(days=days))
+        if start_key <= end_key:
+            statement = statement.where(
+                Contact.birthday_key.between(start_key, end_key)
+            )
+        else:
+            statement = statement.where(
+                or_(Contact.birthday_key >= start_key, Contact.birthday_key <= end_key)
+            )
+
+    return statement.order_by(
+        case((Contact.birthday_key >= start_key, 0), else_=1),
+        Contact.birthday_key,
+        Contact.id,
+    )
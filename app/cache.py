@@ -0,0 +1,114 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency, only needed for a shared cache
+    redis = None
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store for cached bytes with per-key expiry.
+    MemoryBackend keeps entries in the current process; RedisBackend is shared
+    by every worker pointing at the same server.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU cache bounded by entry count and, optionally, total size
+    of the stored values in bytes.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.size_bytes += len(value)
+
+        while self.entries and (
+            len(self.entries) > self.max_entries
+            or (self.max_bytes is not None and self.size_bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self.entries)))
+
+    async def delete(self, key: str) -> None:
+        if key in self.entries:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, value = self.entries.pop(key)
+        self.size_bytes -= len(value)
+
+
+class RedisBackend(CacheBackend):
+    """Cache shared between workers, stored in Redis (or a Redis-protocol server)."""
+
+    def __init__(self, url: str, prefix: str = ""):
+        if redis is None:
+            raise RuntimeError("RedisBackend requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+def create_cache_backend(
+    prefix: str, max_entries: int = 1024, max_bytes: Optional[int] = None
+) -> CacheBackend:
+    """
+    Use the shared Redis cache when CACHE_REDIS_URL is configured, otherwise
+    an in-process MemoryBackend.
+    """
+    if CACHE_REDIS_URL:
+        return RedisBackend(CACHE_REDIS_URL, prefix=prefix)
+    return MemoryBackend(max_entries=max_entries, max_bytes=max_bytes)
@@ -2,6 +2,7 @@ import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
 import os
+from typing import BinaryIO, Optional
 
 load_dotenv()
 
@@ -12,15 +13,23 @@ cloudinary.config(
 )
 
 
-def upload_photo(file: bytes, folder: str = "contacts") -> tuple[str, str]:
+def upload_photo(
+    file: bytes | BinaryIO, folder: str = "contacts", chunk_size: Optional[int] = None
+) -> tuple[str, str]:
     """
-    Upload a photo to Cloudinary
+    Upload a photo to Cloudinary. With chunk_size, a file-like object is
+    read and sent chunk_size bytes at a time.
     Returns: tuple of (photo_url, public_id)
     """
     try:
-        upload_result = cloudinary.uploader.upload(
-            file, folder=folder, resource_type="auto"
-        )
+        if chunk_size is not None:
+            upload_result = cloudinary.uploader.upload_large(
+                file, folder=folder, resource_type="auto", chunk_size=chunk_size
+            )
+        else:
+            upload_result = cloudinary.uploader.upload(
+                file, folder=folder, resource_type="auto"
+            )
         return upload_result["secure_url"], upload_result["public_id"]
     except Exception as e:
         raise Exception(f"Failed to upload photo: {str(e)}")
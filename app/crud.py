@@ -0,0 +1,288 @@
+"""
+Single-statement writes for users and contacts.
+
+Every write is one INSERT/UPDATE/DELETE ... RETURNING, so the route gets the
+stored row back without a follow-up SELECT. Contact statements are scoped by
+user_id, and a statement that matched no row returns None.
+
+Contact writes are stamped with the next value of the owner's change_seq,
+which the change feed pages by. On PostgreSQL the counter is bumped by a
+CTE of the write itself; other dialects run a separate UPDATE first. Either
+way the users row stays locked until commit, so the user's changes commit
+in sequence order.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, any_, bindparam, literal, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select, delete, insert, or_, select, update
+
+from app.auth import invalidate_principal_on_commit
+from app.models import Contact, ContactTombstone, User
+
+
+async def user_exists(db: AsyncSession, username: str, email: str) -> bool:
+    result = await db.execute(
+        select(User.id)
+        .where((User.username == username) | (User.email == email))
+        .limit(1)
+    )
+    return result.first() is not None
+
+
+async def create_user(db: AsyncSession, **values) -> Optional[User]:
+    """
+    Insert a user unless the username or email is taken, in which case
+    nothing is written and None is returned. Uses ON CONFLICT DO NOTHING,
+    so concurrent sign-ups cannot race each other into a unique violation.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(User).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        statement = sqlite.insert(User).on_conflict_do_nothing()
+    else:
+        statement = insert(User)
+
+    try:
+        result = await db.execute(statement.values(**values).returning(User))
+    except IntegrityError:
+        await db.rollback()
+        return None
+    return result.scalar_one_or_none()
+
+
+async def update_user_password(db: AsyncSession, user_id: UUID, password: str) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(password=password))
+    invalidate_principal_on_commit(db, user_id)
+
+
+# The PostgreSQL CTEs are textual: a nested UPDATE construct makes the
+# compiler drop the Python-side defaults (id, created_at, ...) of the outer
+# write.
+def _bump_change_seq(condition: str = ""):
+    return (
+        text(
+            "UPDATE users SET change_seq = change_seq + 1 "
+            f"WHERE id = :change_seq_user_id{condition} RETURNING change_seq"
+        )
+        .bindparams(bindparam("change_seq_user_id", type_=User.id.type))
+        .columns(change_seq=BigInteger)
+    )
+
+
+BUMP_CHANGE_SEQ = _bump_change_seq()
+# Only bumps when the change_target CTE selects a row to write.
+BUMP_CHANGE_SEQ_IF_TARGET = _bump_change_seq(
+    " AND EXISTS (SELECT 1 FROM change_target)"
+)
+
+
+async def reserve_change_seqs(db: AsyncSession, user_id: UUID, count: int) -> int:
+    """Reserve count change sequence numbers of the user; returns the last one."""
+    # updated_at is kept as is: the user's profile has not changed.
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(change_seq=User.change_seq + count, updated_at=User.updated_at)
+        .returning(User.change_seq)
+    )
+    return result.scalar_one()
+
+
+async def _next_change_seq(
+    db: AsyncSession, user_id: UUID, target: Optional[Select] = None
+):
+    """
+    The change_seq value for a single write, and the CTEs the write
+    statement must add (none when the counter has already been bumped).
+
+    With target, a SELECT of the rows the write will change, the PostgreSQL
+    counter is only bumped if it selects any; otherwise the value is NULL.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return await reserve_change_seqs(db, user_id, 1), ()
+    if target is None:
+        seq = BUMP_CHANGE_SEQ.params(change_seq_user_id=user_id).cte("change_seq")
+        return select(seq.c.change_seq).scalar_subquery(), (seq,)
+    seq = BUMP_CHANGE_SEQ_IF_TARGET.params(change_seq_user_id=user_id)
+    seq = seq.add_cte(target.cte("change_target")).cte("change_seq")
+    return select(seq.c.change_seq).scalar_subquery(), (seq,)
+
+
+def _with_cte(statement, ctes):
+    return statement.add_cte(*ctes) if ctes else statement
+
+
+async def create_contact(db: AsyncSession, user_id: UUID, **values) -> Contact:
+    change_seq, ctes = await _next_change_seq(db, user_id)
+    statement = insert(Contact).values(user_id=user_id, change_seq=change_seq, **values)
+    result = await db.execute(_with_cte(statement.returning(Contact), ctes))
+    return result.scalar_one()
+
+
+async def update_contact(
+    db: AsyncSession,
+    user_id: UUID,
+    contact_id: UUID,
+    expected_updated_at: Optional[datetime] = None,
+    skip_unchanged: bool = False,
+    **values,
+) -> Optional[Contact]:
+    """
+    Update the user's contact. With expected_updated_at the row is only
+    changed if it still has that version. With skip_unchanged it is only
+    changed if some value differs from the stored one (IS DISTINCT FROM), so
+    a no-op update matches no row and the caller can roll back instead of
+    committing.
+    """
+    conditions = [Contact.id == contact_id, Contact.user_id == user_id]
+    if expected_updated_at is not None:
+        conditions.append(Contact.updated_at == expected_updated_at)
+    if skip_unchanged:
+        conditions.append(
+            or_(
+                *(
+                    getattr(Contact, name).is_distinct_from(value)
+                    for name, value in values.items()
+                )
+            )
+        )
+    # The counter is only bumped when a row is going to change, so a
+    # missing, stale or unchanged contact leaves the users row alone.
+    change_seq, ctes = await _next_change_seq(
+        db, user_id, select(Contact.id).where(*conditions)
+    )
+    statement = update(Contact).where(*conditions)
+    if ctes:
+        statement = statement.where(change_seq.is_not(None))
+    statement = statement.values(change_seq=change_seq, **values)
+    result = await db.execute(_with_cte(statement.returning(Contact), ctes))
+    return result.scalar_one_or_none()
+
+
+async def delete_contact(
+    db: AsyncSession,
+    user_id: UUID,
+    contact_id: UUID,
+    expected_updated_at: Optional[datetime] = None,
+) -> Optional[UUID]:
+    """
+    Delete the user's contact and leave a tombstone for the change feed.
+    Returns its id, or None if nothing matched.
+    """
+    statement = delete(Contact).where(
+        Contact.id == contact_id, Contact.user_id == user_id
+    )
+    if expected_updated_at is not None:
+        statement = statement.where(Contact.updated_at == expected_updated_at)
+    statement = statement.returning(Contact.id, Contact.user_id)
+
+    if db.bind.dialect.name == "postgresql":
+        change_seq, ctes = await _next_change_seq(db, user_id)
+        deleted = statement.cte("deleted")
+        # deleted_at is given explicitly: the nested DELETE makes the
+        # compiler drop the Python-side defaults of the INSERT.
+        rows = select(
+            deleted.c.id,
+            deleted.c.user_id,
+            change_seq,
+            literal(datetime.utcnow(), DateTime()),
+        )
+        tombstone = (
+            insert(ContactTombstone)
+            .from_select(["contact_id", "user_id", "change_seq", "deleted_at"], rows)
+            .returning(ContactTombstone.contact_id)
+            .add_cte(*ctes, deleted)
+        )
+        result = await db.execute(tombstone)
+        return result.scalar_one_or_none()
+
+    result = await db.execute(statement)
+    deleted_id = result.scalar_one_or_none()
+    if deleted_id is not None:
+        change_seq = await reserve_change_seqs(db, user_id, 1)
+        await db.execute(
+            insert(ContactTombstone).values(
+                contact_id=deleted_id, user_id=user_id, change_seq=change_seq
+            )
+        )
+    return deleted_id
+
+
+def contact_id_in(db: AsyncSession, ids: List[UUID]):
+    """
+    Contact.id filter for a batch of ids: = ANY(:ids) with a single array
+    parameter on PostgreSQL, so every batch size shares one statement, and
+    IN elsewhere.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return Contact.id == any_(
+            bindparam("ids", list(ids), type_=ARRAY(Contact.id.type))
+        )
+    return Contact.id.in_(ids)
+
+
+async def patch_contacts(db: AsyncSession, user_id: UUID, patches: List[dict]) -> None:
+    """
+    Apply partial updates to the user's contacts, each a dict of the contact
+    id and the columns to set. Patches setting the same columns are written
+    by one executemany UPDATE; ids the user does not own match no row.
+    """
+    patches = [patch for patch in patches if len(patch) > 1]
+    if not patches:
+        return
+
+    last_seq = await reserve_change_seqs(db, user_id, len(patches))
+    groups = defaultdict(list)
+    for change_seq, patch in enumerate(patches, last_seq - len(patches) + 1):
+        values = {name: value for name, value in patch.items() if name != "id"}
+        groups[tuple(sorted(values))].append(
+            {"contact_id": patch["id"], "change_seq": change_seq, **values}
+        )
+
+    table = Contact.__table__
+    statement = update(table).where(
+        table.c.id == bindparam("contact_id"), table.c.user_id == user_id
+    )
+    for rows in groups.values():
+        await db.execute(statement, rows)
+
+
+async def delete_contacts(
+    db: AsyncSession, user_id: UUID, ids: List[UUID]
+) -> List[UUID]:
+    """
+    Delete the user's contacts among ids with one statement and leave
+    tombstones for them. Returns the ids that were deleted.
+    """
+    result = await db.execute(
+        delete(Contact)
+        .where(contact_id_in(db, ids), Contact.user_id == user_id)
+        .returning(Contact.id)
+    )
+    deleted = result.scalars().all()
+    if deleted:
+        last_seq = await reserve_change_seqs(db, user_id, len(deleted))
+        await db.execute(
+            insert(ContactTombstone),
+            [
+                {"contact_id": contact_id, "user_id": user_id, "change_seq": seq}
+                for seq, contact_id in enumerate(deleted, last_seq - len(deleted) + 1)
+            ],
+        )
+    return deleted
+
+
+async def contact_exists(db: AsyncSession, user_id: UUID, contact_id: UUID) -> bool:
+    result = await db.execute(
+        select(Contact.id).where(Contact.id == contact_id, Contact.user_id == user_id)
+    )
+    return result.first() is not None
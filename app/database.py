@@ -1,20 +1,89 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy import create_engine, make_url, text, Engine
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import UUID
+import asyncio
+import itertools
+import logging
 import os
 from dotenv import load_dotenv
+from app.cache import create_cache_backend
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
 
-SYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
+SYNC_DRIVERS = {"postgresql+asyncpg": "postgresql", "sqlite+aiosqlite": "sqlite"}
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(url: URL) -> dict:
+    """Engine keyword arguments built from the DB_* settings."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def create_engine_from_settings(database_url: str) -> AsyncEngine:
+    url = make_url(database_url)
+    if url.drivername == "postgresql+asyncpg":
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+        )
+    return create_async_engine(url, **engine_options(url))
+
+
+def get_sync_database_url(database_url: str = DATABASE_URL) -> URL:
+    url = make_url(database_url)
+    return url.set(drivername=SYNC_DRIVERS.get(url.drivername, url.drivername))
 
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 
-sync_engine = create_engine(SYNC_DATABASE_URL, echo=True, future=True)
+_sync_engine: Optional[Engine] = None
+
+
+def get_sync_engine() -> Engine:
+    """
+    Synchronous engine for Alembic and scripts. The app itself only uses
+    async_engine, so this one is created on first use.
+    """
+    global _sync_engine
+    if _sync_engine is None:
+        url = get_sync_database_url()
+        _sync_engine = create_engine(url, **engine_options(url))
+    return _sync_engine
+
+
+async_engine = create_engine_from_settings(DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
@@ -23,6 +92,97 @@ AsyncSessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+class ReplicaSet:
+    """
+    Read replicas picked round-robin. A replica that fails a health check or
+    drops a connection is skipped until a later health check succeeds.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.engines = [create_engine_from_settings(url) for url in urls]
+        self.healthy = [True] * len(self.engines)
+        self.positions = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[int]:
+        for _ in self.engines:
+            index = next(self.positions) % len(self.engines)
+            if self.healthy[index]:
+                return index
+        return None
+
+    def mark_down(self, index: int) -> None:
+        if self.healthy[index]:
+            logger.warning("Read replica %s marked down", self.engines[index].url)
+        self.healthy[index] = False
+
+    async def check_health(self) -> None:
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                self.healthy[index] = True
+            except Exception:
+                self.mark_down(index)
+
+    async def monitor(self, interval: float = REPLICA_HEALTH_CHECK_SECONDS) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+recent_writers = create_cache_backend("recent-write:", max_entries=100000)
+
+
+def is_disconnect(error: Optional[BaseException]) -> bool:
+    """Whether error, or an error it was raised from, is a lost connection."""
+    while error is not None:
+        if isinstance(error, (OSError, InterfaceError, OperationalError)) or (
+            isinstance(error, DBAPIError) and error.connection_invalidated
+        ):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+async def mark_write(user_id: UUID) -> None:
+    """
+    Route the user's reads to the primary for READ_YOUR_WRITES_SECONDS so
+    they see their own writes despite replication lag.
+    """
+    if replica_set:
+        await recent_writers.set(str(user_id), b"1", READ_YOUR_WRITES_SECONDS)
+
+
+@asynccontextmanager
+async def read_session(user_id: Optional[UUID] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only work: bound to a healthy replica when one is
+    configured, otherwise (or right after the user wrote) to the primary.
+    """
+    index = None
+    if replica_set and not (
+        user_id is not None and await recent_writers.get(str(user_id))
+    ):
+        index = replica_set.choose()
+
+    if index is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    async with AsyncSessionLocal(bind=replica_set.engines[index]) as session:
+        try:
+            yield session
+        except Exception as e:
+            if is_disconnect(e):
+                replica_set.mark_down(index)
+            raise
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,88 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def contact_etag(
+    contact_id: UUID, updated_at: datetime, fields: Optional[list] = None
+) -> str:
+    """
+    Strong ETag of a single contact, built from its id and updated_at, and
+    of the fields returned when it is a sparse representation.
+    """
+    version = (updated_at - EPOCH) // timedelta(microseconds=1)
+    etag = f'"{contact_id.hex}.{version:x}"'
+    return sparse_etag(etag, fields) if fields is not None else etag
+
+
+def sparse_etag(etag: str, fields: list) -> str:
+    """The ETag of the representation of etag reduced to fields."""
+    digest = hashlib.sha1(",".join(fields).encode()).hexdigest()[:8]
+    return f'{etag[:-1]}.{digest}"'
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Contact has been modified",
+    )
+
+
+def if_match_version(if_match: Optional[str], contact_id: UUID) -> Optional[datetime]:
+    """
+    The updated_at of contact_id that an If-Match header was issued for, to
+    be used as a predicate of the write. None when any version is acceptable.
+    Raises a 412 HTTPException if the header names no version of the contact.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    for tag in if_match.split(","):
+        try:
+            tag_id, version, *_ = tag.strip().strip('"').split(".")
+            if UUID(tag_id) == contact_id:
+                return EPOCH + timedelta(microseconds=int(version, 16))
+        except ValueError:
+            continue
+    raise precondition_failed()
+
+
+def list_etag(user_id: UUID, version: tuple, *params) -> str:
+    """
+    Strong ETag of a page of the user's contacts: a digest of a version of
+    the whole address book (the user's change_seq, which every contact
+    write bumps) and of the parameters that select the page.
+    """
+    raw = "|".join(str(part) for part in (user_id, *version, *params))
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """
+    Whether an If-None-Match (weak comparison) or If-Match (weak=False)
+    header value matches etag.
+    """
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, response: Response) -> Response:
+    """A 304 for etag, carrying the headers set on the injected response."""
+    headers = dict(response.headers)
+    headers["ETag"] = etag
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,62 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Sequence, Type
+
+from pydantic import BaseModel
+
+from app.serialization import dump_row
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+async def ndjson_chunks(partitions: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    """Serialize each batch of column-projected rows as newline-delimited JSON."""
+    async for rows in partitions:
+        yield b"".join(dump_row(row) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    # Formatted as in the JSON exports; None is written as an empty cell.
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(
+    partitions: AsyncIterator[Sequence], schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Serialize each batch of column-projected rows as CSV, preceded by a
+    header row of the schema's fields.
+    """
+    fields = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+
+    async for rows in partitions:
+        for row in rows:
+            writer.writerow(
+                {name: _csv_value(value) for name, value in row._mapping.items()}
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream incrementally."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,106 @@
+import csv
+import json
+from typing import AsyncIterator
+
+DEFAULT_IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str | ValueError]:
+    """
+    Split a stream of UTF-8 byte chunks into lines without buffering the body.
+    A leading byte order mark is dropped. A line that is not valid UTF-8 is
+    yielded as a ValueError, so it is reported as one bad record.
+    """
+    buffer = b""
+    first = True
+
+    def decode(line: bytes) -> str | ValueError:
+        nonlocal first
+        encoding, first = ("utf-8-sig" if first else "utf-8"), False
+        try:
+            return line.decode(encoding).rstrip("\r")
+        except UnicodeDecodeError as e:
+            return ValueError(
+                f"Invalid UTF-8 at byte {e.start} of the line: {e.reason}"
+            )
+
+    async for chunk in chunks:
+        # A newline byte never occurs inside a multi-byte UTF-8 sequence.
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield decode(line)
+
+    if buffer:
+        yield decode(buffer)
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[str | ValueError],
+) -> AsyncIterator[dict | ValueError]:
+    """
+    Parse CSV lines into dicts keyed by the header row.
+    Quoted values may span several lines. Empty values become None.
+    An undecodable line drops the record it belongs to.
+    """
+    header = None
+    pending = None
+    async for line in lines:
+        if isinstance(line, ValueError):
+            pending = None
+            yield line
+            continue
+
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            continue
+
+        record, pending = pending, None
+        if not record.strip():
+            continue
+
+        row = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+
+        yield {name: value or None for name, value in zip(header, row)}
+
+    if pending is not None:
+        yield ValueError("Unterminated quoted value at the end of the CSV input")
+
+
+async def iter_ndjson_records(
+    lines: AsyncIterator[str | ValueError],
+) -> AsyncIterator[dict | ValueError]:
+    """
+    Parse newline-delimited JSON objects, skipping blank lines.
+    Malformed lines are yielded as the ValueError raised while decoding them,
+    so one bad record does not abort the import.
+    """
+    async for line in lines:
+        if isinstance(line, ValueError):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+async def iter_records(
+    chunks: AsyncIterator[bytes], format: str
+) -> AsyncIterator[dict | ValueError]:
+    lines = iter_lines(chunks)
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    async for record in records:
+        yield record
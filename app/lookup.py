@@ -0,0 +1,68 @@
+import re
+import sys
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.sql import Select, and_, select
+
+from app.models import Contact
+
+DEFAULT_LOOKUP_LIMIT = 10
+MAX_LOOKUP_LIMIT = 100
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone: str) -> str:
+    """Digits of a phone number, as stored in contacts.phone_digits."""
+    return _NON_DIGITS.sub("", phone)
+
+
+def normalize_email(email: str) -> str:
+    """
+    An email address as stored in contacts.email_lower, lower(trim(email)).
+    trim() only removes spaces, so only spaces are stripped here.
+    """
+    return email.strip(" ").lower()
+
+
+def _prefix_match(column, prefix: str, dialect: str):
+    """
+    column starts with prefix, as a range over the column so a btree index
+    is probed once. On PostgreSQL the range uses the text_pattern_ops
+    operators, which compare bytewise like the index does.
+    """
+    if ord(prefix[-1]) == sys.maxunicode:
+        return column.startswith(prefix, autoescape=True)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    if dialect == "postgresql":
+        return and_(column.op("~>=~")(prefix), column.op("~<~")(upper))
+    return and_(column >= prefix, column < upper)
+
+
+def lookup_contacts_query(
+    user_id: UUID,
+    dialect: str,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    prefix: bool = False,
+    limit: int = DEFAULT_LOOKUP_LIMIT,
+) -> Select:
+    """
+    Select the user's contacts whose normalized phone or email equals (or
+    with prefix, starts with) the normalized value, using the
+    (user_id, phone_digits) or (user_id, email_lower) index.
+    Exactly one of phone and email must be given.
+    """
+    if phone is not None:
+        column, value = Contact.phone_digits, normalize_phone(phone)
+    else:
+        column, value = Contact.email_lower, normalize_email(email)
+
+    match = _prefix_match(column, value, dialect) if prefix else column == value
+    return (
+        select(Contact)
+        .where(Contact.user_id == user_id, match)
+        .order_by(column, Contact.id)
+        .limit(limit)
+    )
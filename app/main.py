@@ -1,10 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.auth import principal_cache
+from app.database import replica_set
+from app.metrics import MetricsMiddleware, metrics, router as metrics_router
+from app.response_cache import response_cache
 from app.routes import router
+from app.storage import MAX_PHOTO_SIZE, MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    health_checks = asyncio.create_task(replica_set.monitor()) if replica_set else None
+    yield
+    if health_checks:
+        health_checks.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
+app.include_router(metrics_router)
+
+metrics.register_gauges("principal_cache", principal_cache.stats)
+metrics.register_gauges("response_cache", response_cache.stats)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,3 +33,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/upload-photo/",
+    max_size=MAX_PHOTO_SIZE + MULTIPART_OVERHEAD,
+)
+
+app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,256 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestTimings:
+    """
+    Where the time of one request went. The route handler time is split into
+    dependencies (authentication and sessions), the endpoint body and
+    response validation/serialization.
+    """
+
+    route: str = ""
+    route_start: float = 0.0
+    endpoint_start: float = 0.0
+    endpoint_end: float = 0.0
+    route_end: float = 0.0
+    db_time: float = 0.0
+    db_queries: int = 0
+
+    @property
+    def dependencies(self) -> float:
+        # The endpoint never starts when a dependency or validation fails.
+        end = self.endpoint_start or self.route_end
+        return max(end - self.route_start, 0.0) if self.route_start else 0.0
+
+    @property
+    def serialization(self) -> float:
+        if not self.endpoint_end:
+            return 0.0
+        return max(self.route_end - self.endpoint_end, 0.0)
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join(
+            [
+                f'auth;dur={self.dependencies * 1000:.2f};desc="dependencies"',
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+                f"serialize;dur={self.serialization * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """In-process metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.latency: dict[tuple, Histogram] = defaultdict(Histogram)
+        self.responses: dict[tuple, int] = defaultdict(int)
+        self.db_queries: dict[tuple, int] = defaultdict(int)
+        self.db_time: dict[tuple, float] = defaultdict(float)
+        self.gauges: dict[str, Callable[[], dict]] = {}
+
+    def observe_request(
+        self, method: str, route: str, status: int, duration: float, timings
+    ) -> None:
+        self.latency[(method, route)].observe(duration)
+        self.responses[(method, route, status)] += 1
+        self.db_queries[(method, route)] += timings.db_queries
+        self.db_time[(method, route)] += timings.db_time
+
+    def register_gauges(self, name: str, collect: Callable[[], dict]) -> None:
+        """Expose the numeric values returned by collect() as {name}_{key}."""
+        self.gauges[name] = collect
+
+    def render(self) -> str:
+        lines = [
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+            )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {histogram.count}"
+            )
+
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(
+                f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {count}'
+            )
+
+        lines.append("# TYPE db_queries_total counter")
+        for (method, route), count in sorted(self.db_queries.items()):
+            lines.append(
+                f'db_queries_total{{method="{method}",route="{route}"}} {count}'
+            )
+
+        lines.append("# TYPE db_time_seconds_total counter")
+        for (method, route), seconds in sorted(self.db_time.items()):
+            lines.append(
+                f'db_time_seconds_total{{method="{method}",route="{route}"}} {seconds}'
+            )
+
+        for name, collect in self.gauges.items():
+            for key, value in collect().items():
+                lines.append(f"# TYPE {name}_{key} gauge")
+                lines.append(f"{name}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is discarded with a failed query.
+    if context is not None:
+        context.metrics_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "metrics_query_start", None)
+    timings = current_timings.get()
+    if start is not None and timings is not None:
+        elapsed = time.perf_counter() - start
+        timings.db_time += elapsed
+        timings.db_queries += 1
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records when the endpoint body starts and ends, so the
+    request time can be split into dependencies, endpoint and serialization.
+    """
+
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                timings = current_timings.get()
+                if timings is not None:
+                    timings.endpoint_start = time.perf_counter()
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    if timings is not None:
+                        timings.endpoint_end = time.perf_counter()
+
+            self.dependant.call = timed_endpoint
+
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            timings = current_timings.get()
+            if timings is None:
+                return await handler(request)
+
+            timings.route = path
+            timings.route_start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                timings.route_end = time.perf_counter()
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency and status counts and adds a Server-Timing
+    header to every HTTP response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = timings.server_timing(time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            metrics.observe_request(
+                scope["method"],
+                timings.route or "unmatched",
+                status,
+                time.perf_counter() - start,
+                timings,
+            )
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
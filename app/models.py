@@ -1,10 +1,94 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, ForeignKey, DateTime, Text
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy_utils import TSVectorType
 from .database import Base
 
+SEARCHABLE_TEXT = (
+    "first_name || ' ' || last_name || ' ' || phone || ' ' || coalesce(email, '')"
+)
+
+
+class contact_search_document(FunctionElement):
+    """
+    Generation expression of contacts.search_vector.
+    PostgreSQL stores a 'simple' tsvector; other dialects (SQLite in tests)
+    store the lower-cased searchable text instead.
+    """
+
+    inherit_cache = True
+
+
+@compiles(contact_search_document)
+def _compile_search_document(element, compiler, **kw):
+    return f"lower({SEARCHABLE_TEXT})"
+
+
+@compiles(contact_search_document, "postgresql")
+def _compile_search_document_pg(element, compiler, **kw):
+    return f"to_tsvector('simple', {SEARCHABLE_TEXT})"
+
+
+class contact_birthday_key(FunctionElement):
+    """
+    Generation expression of contacts.birthday_key: the month/day of the
+    birthdate as month * 100 + day, e.g. 229 for February 29.
+    """
+
+    inherit_cache = True
+
+
+@compiles(contact_birthday_key)
+def _compile_birthday_key(element, compiler, **kw):
+    return "CAST(strftime('%m%d', birthdate) AS INTEGER)"
+
+
+@compiles(contact_birthday_key, "postgresql")
+def _compile_birthday_key_pg(element, compiler, **kw):
+    return (
+        "CAST(EXTRACT(MONTH FROM birthdate) * 100 "
+        "+ EXTRACT(DAY FROM birthdate) AS INTEGER)"
+    )
+
+
+class contact_phone_digits(FunctionElement):
+    """
+    Generation expression of contacts.phone_digits: the phone number with
+    every non-digit removed, e.g. 380501234567 for "+380 (50) 123-45-67".
+    SQLite has no regexp_replace and strips the usual separators instead.
+    """
+
+    inherit_cache = True
+
+
+PHONE_SEPARATORS = " +-().,/"
+
+
+@compiles(contact_phone_digits)
+def _compile_phone_digits(element, compiler, **kw):
+    expression = "phone"
+    for separator in PHONE_SEPARATORS:
+        expression = f"replace({expression}, '{separator}', '')"
+    return expression
+
+
+@compiles(contact_phone_digits, "postgresql")
+def _compile_phone_digits_pg(element, compiler, **kw):
+    return "regexp_replace(phone, '[^0-9]', '', 'g')"
+
 
 class User(Base):
     __tablename__ = "users"
@@ -21,6 +105,8 @@ class User(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    # Last change sequence number handed out to a write of the user's contacts.
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
 
     contacts: Mapped[list["Contact"]] = relationship(
         "Contact", back_populates="owner", cascade="all, delete"
@@ -29,6 +115,35 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index(
+            "ix_contacts_search_vector", "search_vector", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+        Index("ix_contacts_user_id_change_seq", "user_id", "change_seq"),
+        Index("ix_contacts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_contacts_user_id_last_name_first_name",
+            "user_id",
+            "last_name",
+            "first_name",
+        ),
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        # text_pattern_ops makes the indexes usable for prefix lookups
+        # whatever the database collation.
+        Index(
+            "ix_contacts_user_id_phone_digits",
+            "user_id",
+            "phone_digits",
+            postgresql_ops={"phone_digits": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_contacts_user_id_email_lower",
+            "user_id",
+            "email_lower",
+            postgresql_ops={"email_lower": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -40,11 +155,43 @@ class Contact(Base):
     last_name: Mapped[str] = mapped_column(String, nullable=False)
     phone: Mapped[str] = mapped_column(String, nullable=False)
     email: Mapped[str | None] = mapped_column(String, nullable=True)
+    phone_digits: Mapped[str | None] = mapped_column(
+        String, Computed(contact_phone_digits(), persisted=True)
+    )
+    email_lower: Mapped[str | None] = mapped_column(
+        String, Computed("lower(trim(email))", persisted=True)
+    )
     birthdate: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    birthday_key: Mapped[int | None] = mapped_column(
+        Integer, Computed(contact_birthday_key(), persisted=True)
+    )
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVectorType().with_variant(Text(), "sqlite"),
+        Computed(contact_search_document(), persisted=True),
+        deferred=True,
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    # The owner's change_seq at the contact's last write, see crud.
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
     owner: Mapped["User"] = relationship("User", back_populates="contacts")
+
+
+class ContactTombstone(Base):
+    """A deleted contact, kept so that the change feed can report the deletion."""
+
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        Index("ix_contact_tombstones_user_id_change_seq", "user_id", "change_seq"),
+    )
+
+    contact_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+from uuid import UUID
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+
+from app.database import AsyncSessionLocal, async_engine
+from app.serialization import dump_row
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, contact_id: UUID) -> str:
+    """
+    Encode the (created_at, id) keyset position of the last row on a page
+    into an opaque, URL-safe cursor string.
+    """
+    raw = f"{created_at.isoformat()}|{contact_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, contact_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), UUID(contact_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+async def stream_partitions(
+    query: Select,
+    batch_size: int = STREAM_BATCH_SIZE,
+    bind: AsyncEngine = async_engine,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield the rows of a query in batches of batch_size, read through a
+    server-side cursor so only one batch is held in memory at a time.
+    The generator owns its session, bound to bind, because request-scoped
+    sessions are closed before a streaming body is sent.
+    """
+    async with AsyncSessionLocal(bind=bind) as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def stream_json_array(
+    query: Select,
+    batch_size: int = STREAM_BATCH_SIZE,
+    bind: AsyncEngine = async_engine,
+) -> AsyncIterator[bytes]:
+    """Stream the rows of a column-projected query as a JSON array, one batch at a time."""
+    separator = b"["
+    async for rows in stream_partitions(query, batch_size, bind):
+        yield separator + b",".join(dump_row(row) for row in rows)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
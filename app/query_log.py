@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.metrics import current_timings
+
+load_dotenv()
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Explain each fingerprint at most once per interval, EXPLAIN ANALYZE runs the query again.
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))
+
+logger = logging.getLogger("app.sql")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    """
+    Normalize a statement so executions that differ only in literals,
+    placeholder style or IN-list length share one fingerprint.
+    Returns: tuple of (fingerprint hash, normalized statement).
+    """
+    normalized = " ".join(statement.split())
+    normalized = _LITERALS.sub("?", _PLACEHOLDERS.sub("?", normalized))
+    normalized = _PLACEHOLDER_LISTS.sub("?, ...", normalized)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+    return digest, normalized
+
+
+def param_shapes(parameters, executemany: bool = False) -> list:
+    """Types (and lengths of strings/bytes) of the bound parameters, never the values."""
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    if isinstance(parameters, dict):
+        parameters = parameters.values()
+
+    def shape(value):
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        return type(value).__name__
+
+    return [shape(value) for value in parameters or ()]
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    statement: str
+    parameters: list
+    duration_ms: float
+    route: Optional[str]
+    recorded_at: datetime
+    plan: Optional[str] = None
+
+
+class SlowQueryLog:
+    """The most recent slow queries, kept in a ring buffer of max_entries."""
+
+    def __init__(self, max_entries: int = SLOW_QUERY_LOG_SIZE):
+        self.entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self.explained: dict[str, float] = {}
+
+    def record(self, entry: SlowQuery) -> None:
+        self.entries.append(entry)
+
+    def should_explain(self, digest: str) -> bool:
+        now = time.monotonic()
+        if (
+            now - self.explained.get(digest, float("-inf"))
+            < SLOW_QUERY_EXPLAIN_INTERVAL
+        ):
+            return False
+        self.explained[digest] = now
+        return True
+
+    def recent(self, limit: Optional[int] = None) -> list[SlowQuery]:
+        entries = list(reversed(self.entries))
+        return entries[:limit] if limit else entries
+
+
+slow_query_log = SlowQueryLog()
+_pending_plans: set[asyncio.Task] = set()
+
+
+async def capture_plan(
+    entry: SlowQuery, engine: Engine, statement: str, parameters
+) -> None:
+    """Attach an EXPLAIN (ANALYZE, BUFFERS) plan of a slow SELECT to its log entry."""
+    try:
+        async with AsyncEngine(engine).connect() as connection:
+            connection = await connection.execution_options(query_log=False)
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+            )
+            entry.plan = "\n".join(row[0] for row in result)
+            await connection.rollback()
+    except Exception as e:
+        logger.warning("EXPLAIN of query %s failed: %s", entry.fingerprint, e)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_log_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_log_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_query(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "query_log_start", None)
+    if start is None or not context.execution_options.get("query_log", True):
+        return
+
+    duration = time.perf_counter() - start
+    slow = duration >= SLOW_QUERY_SECONDS
+    if not slow and random.random() >= SQL_LOG_SAMPLE_RATE:
+        return
+
+    digest, normalized = fingerprint(statement)
+    timings = current_timings.get()
+    entry = SlowQuery(
+        fingerprint=digest,
+        statement=normalized,
+        parameters=param_shapes(parameters, executemany),
+        duration_ms=round(duration * 1000, 3),
+        route=timings.route if timings is not None else None,
+        recorded_at=datetime.now(timezone.utc),
+    )
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        json.dumps(
+            {"event": "slow_query" if slow else "query", **asdict(entry)}, default=str
+        ),
+    )
+    if not slow:
+        return
+
+    slow_query_log.record(entry)
+    if (
+        SLOW_QUERY_EXPLAIN
+        and conn.dialect.name == "postgresql"
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and not executemany
+        and slow_query_log.should_explain(digest)
+    ):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # A fresh context keeps the EXPLAIN out of the request's own metrics.
+        task = loop.create_task(
+            capture_plan(entry, conn.engine, statement, parameters),
+            context=contextvars.Context(),
+        )
+        _pending_plans.add(task)
+        task.add_done_callback(_pending_plans.discard)
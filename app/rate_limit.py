@@ -1,41 +1,203 @@
-from fastapi import HTTPException, status
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
-from collections import defaultdict
+from fastapi import HTTPException, Response, status
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import math
+import os
 import time
 
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional dependency, only needed for a shared store
+    redis = None
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("CACHE_REDIS_URL"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Scales every limit, e.g. for load tests that should not be throttled.
+RATE_LIMIT_MULTIPLIER = float(os.getenv("RATE_LIMIT_MULTIPLIER", "1"))
+WINDOW_SECONDS = 60
+
+
+class RateLimitStore(ABC):
+    """
+    Per-key request counters for fixed windows. Windows are identified by
+    their index, i.e. int(timestamp // WINDOW_SECONDS).
+    """
+
+    @abstractmethod
+    async def increment(self, key: str, window: int) -> Tuple[int, int]:
+        """
+        Count a request for key in window.
+        Returns: tuple of (previous window count, current window count).
+        """
+
+    @abstractmethod
+    async def decrement(self, key: str, window: int) -> None:
+        """Take back a request that was counted but rejected."""
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Counters kept in the current process. Keys idle for more than a window
+    are evicted as new requests come in, and at most max_keys are kept.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [window, current window count, previous window count]
+        self.counters: OrderedDict[str, list] = OrderedDict()
+
+    async def increment(self, key: str, window: int) -> Tuple[int, int]:
+        counter = self.counters.get(key)
+
+        if counter is None:
+            counter = self.counters[key] = [window, 0, 0]
+        else:
+            self.counters.move_to_end(key)
+            if counter[0] != window:
+                previous = counter[1] if counter[0] == window - 1 else 0
+                counter[:] = [window, 0, previous]
+
+        counter[1] += 1
+        self._evict(window)
+        return counter[2], counter[1]
+
+    async def decrement(self, key: str, window: int) -> None:
+        counter = self.counters.get(key)
+        if counter is not None and counter[0] == window and counter[1] > 0:
+            counter[1] -= 1
+
+    def _evict(self, window: int) -> None:
+        # Keys are ordered by last use, so idle keys are always at the front.
+        while self.counters:
+            key, counter = next(iter(self.counters.items()))
+            if counter[0] >= window - 1 and len(self.counters) <= self.max_keys:
+                break
+            del self.counters[key]
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Counters shared by every worker, stored in Redis."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if redis is None:
+            raise RuntimeError("RedisRateLimitStore requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def increment(self, key: str, window: int) -> Tuple[int, int]:
+        current_key = f"{self.prefix}{key}:{window}"
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, 2 * WINDOW_SECONDS)
+            pipe.get(f"{self.prefix}{key}:{window - 1}")
+            current, _, previous = await pipe.execute()
+        return int(previous or 0), int(current)
+
+    async def decrement(self, key: str, window: int) -> None:
+        await self.client.decr(f"{self.prefix}{key}:{window}")
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    if RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitStore(RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitStore()
+
+
+@dataclass
+class RateLimitResult:
+    limited: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if self.limited:
+            headers["Retry-After"] = str(math.ceil(self.retry_after))
+        return headers
+
 
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = 60):
-        self.requests_per_minute = requests_per_minute
-        self.requests: Dict[str, list] = defaultdict(list)
+    """
+    Sliding window counter: the request count over the last minute is
+    estimated from the current and previous fixed windows, weighting the
+    previous one by how much of it still overlaps the sliding window.
+    Every check is O(1) in time and memory per key.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        name: str = "default",
+        store: Optional[RateLimitStore] = None,
+    ):
+        self.requests_per_minute = max(
+            int(requests_per_minute * RATE_LIMIT_MULTIPLIER), 1
+        )
+        self.name = name
+        self.store = store or default_store
 
-    def is_rate_limited(self, user_id: str) -> Tuple[bool, float]:
+    async def hit(self, user_id: str) -> RateLimitResult:
         current_time = time.time()
-        user_requests = self.requests[user_id]
+        window, offset = divmod(current_time, WINDOW_SECONDS)
+        window = int(window)
+        elapsed = offset / WINDOW_SECONDS
+        key = f"{self.name}:{user_id}"
+        limit = self.requests_per_minute
+
+        previous, current = await self.store.increment(key, window)
+        estimate = previous * (1 - elapsed) + current
+        reset = WINDOW_SECONDS - offset
+
+        if estimate <= limit:
+            return RateLimitResult(False, limit, int(limit - estimate), reset, 0)
+
+        await self.store.decrement(key, window)
+        current -= 1
+
+        if current + 1 > limit:
+            # Wait for the next window, then for this window's weight to fade.
+            wait = reset + WINDOW_SECONDS * (1 - (limit - 1) / current)
+        else:
+            # Wait for the previous window's weight to fade enough.
+            wait = WINDOW_SECONDS * (1 - (limit - current - 1) / previous) - offset
 
-        user_requests = [
-            req_time for req_time in user_requests if current_time - req_time < 60
-        ]
+        return RateLimitResult(True, limit, 0, reset, max(wait, 0))
 
-        if len(user_requests) >= self.requests_per_minute:
-            time_until_next = 60 - (current_time - user_requests[0])
-            return True, time_until_next
+    async def is_rate_limited(self, user_id: str) -> Tuple[bool, float]:
+        result = await self.hit(user_id)
+        return result.limited, result.retry_after
 
-        user_requests.append(current_time)
-        self.requests[user_id] = user_requests
-        return False, 0
 
+default_store = create_rate_limit_store()
 
-contact_creation_limiter = RateLimiter(requests_per_minute=5)
-contact_search_limiter = RateLimiter(requests_per_minute=30)
-contact_general_limiter = RateLimiter(requests_per_minute=60)
+contact_creation_limiter = RateLimiter(requests_per_minute=5, name="contact_creation")
+contact_search_limiter = RateLimiter(requests_per_minute=30, name="contact_search")
+contact_general_limiter = RateLimiter(requests_per_minute=60, name="contact_general")
+contact_import_limiter = RateLimiter(requests_per_minute=2, name="contact_import")
 
 
-async def check_rate_limit(limiter: RateLimiter, user_id: str):
-    is_limited, time_until_next = limiter.is_rate_limited(user_id)
-    if is_limited:
+async def check_rate_limit(
+    limiter: RateLimiter, user_id: str, response: Optional[Response] = None
+):
+    result = await limiter.hit(user_id)
+    if result.limited:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Too many requests. Please try again in {time_until_next:.1f} seconds.",
+            detail=f"Too many requests. Please try again in {result.retry_after:.1f} seconds.",
+            headers=result.headers,
         )
+    if response is not None:
+        response.headers.update(result.headers)
@@ -0,0 +1,139 @@
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+from uuid import UUID, uuid4
+
+import orjson
+from dotenv import load_dotenv
+from fastapi import Response
+
+from app.cache import CacheBackend, create_cache_backend
+from app.etags import etag_matches, not_modified, sparse_etag
+
+load_dotenv()
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "100000"))
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+
+
+def json_response(
+    body: bytes, response: Response, headers: Optional[dict] = None
+) -> Response:
+    """
+    Response with an already serialized JSON body, carrying the headers set
+    on the injected response, which FastAPI drops when a Response is
+    returned directly.
+    """
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**response.headers, **(headers or {})},
+    )
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: dict
+
+    def encode(self) -> bytes:
+        return json.dumps(self.headers).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedResponse":
+        headers, body = data.split(b"\n", 1)
+        return cls(body, json.loads(headers))
+
+    def select(self, fields: list) -> "CachedResponse":
+        """The cached JSON object reduced to fields, with a matching ETag."""
+        value = orjson.loads(self.body)
+        body = orjson.dumps({name: value[name] for name in fields})
+        headers = dict(self.headers)
+        if "ETag" in headers:
+            headers["ETag"] = sparse_etag(headers["ETag"], fields)
+        return CachedResponse(body, headers)
+
+    def to_response(
+        self, response: Response, if_none_match: Optional[str] = None
+    ) -> Response:
+        etag = self.headers.get("ETag")
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag, response)
+        return json_response(self.body, response, self.headers)
+
+
+class ResponseCache:
+    """
+    Serialized responses of the contact read endpoints, per user.
+
+    Single contacts, lists and birthday windows are cached under the user's
+    current generation; any change to the user's contacts starts a new
+    generation, so all of them become unreachable at once and age out of
+    the backend. Keys are taken before the database is read, so a response
+    read before a write commits is stored under the old generation, where
+    no later lookup finds it.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def generation(self, user_id: UUID) -> str:
+        key = f"generation:{user_id}"
+        generation = await self.backend.get(key)
+        if generation is None:
+            # Never reuse a generation, entries cached under it may be stale.
+            generation = uuid4().hex.encode()
+            await self.backend.set(key, generation, self.ttl)
+        return generation.decode()
+
+    async def contact_key(self, user_id: UUID, contact_id: UUID) -> str:
+        return await self.list_key(user_id, "contact", contact_id)
+
+    async def list_key(self, user_id: UUID, kind: str, *params) -> str:
+        generation = await self.generation(user_id)
+        return f"{kind}:{user_id}:{generation}:" + "|".join(str(p) for p in params)
+
+    async def birthdays_key(self, user_id: UUID, start: date, days: int) -> str:
+        return await self.list_key(user_id, "birthdays", start.isoformat(), days)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        data = await self.backend.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResponse.decode(data)
+
+    async def set(self, key: str, body: bytes, headers: Optional[dict] = None) -> None:
+        entry = CachedResponse(body, headers or {})
+        await self.backend.set(key, entry.encode(), self.ttl)
+
+    async def invalidate_user(self, user_id: UUID) -> None:
+        """Make every cached response of the user's contacts unreachable."""
+        await self.backend.delete(f"generation:{user_id}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache(
+    create_cache_backend(
+        "response:",
+        max_entries=RESPONSE_CACHE_SIZE,
+        max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ),
+    ttl=RESPONSE_CACHE_TTL,
+)
@@ -1,17 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Header,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4, UUID
-from typing import List
-from datetime import datetime, timedelta
-from sqlalchemy.sql import select, func
+from typing import List, Optional
+from datetime import date, datetime
+from sqlalchemy.sql import select, insert, tuple_
+from pydantic import ValidationError
 
-from app.database import get_db
-from app.models import User, Contact
+from app.database import get_db, mark_write
+from app.models import User, Contact, ContactTombstone
 from app.auth import (
-    get_password_hash,
-    verify_password,
+    hash_password,
+    verify_and_update_password,
     create_access_token,
+    get_admin_user,
     get_current_user,
+    get_read_db,
 )
 from app.schemas import (
     UserCreate,
@@ -21,6 +39,15 @@ from app.schemas import (
     LoginResponse,
     ContactCreate,
     ContactResponse,
+    ContactChangesResponse,
+    ContactBatchIds,
+    ContactPatch,
+    ContactBatchPatchRequest,
+    ContactBatchResponse,
+    ContactBatchResult,
+    ContactImportError,
+    ContactImportResponse,
+    SlowQueryResponse,
     ContactSearchResponse,
     UpcomingBirthdayResponse,
     PhotoUploadResponse,
@@ -30,10 +57,60 @@ from app.rate_limit import (
     contact_creation_limiter,
     contact_search_limiter,
     contact_general_limiter,
+    contact_import_limiter,
+)
+from app.storage import MAX_PHOTO_SIZE, PhotoTooLarge, upload_photo
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor,
+    stream_json_array,
+    stream_partitions,
+)
+from app.exports import EXPORT_FORMATS, ndjson_chunks, csv_chunks, gzip_chunks
+from app.birthdays import (
+    DEFAULT_BIRTHDAY_WINDOW_DAYS,
+    MAX_BIRTHDAY_WINDOW_DAYS,
+    upcoming_birthdays_query,
+)
+from app.imports import (
+    DEFAULT_IMPORT_BATCH_SIZE,
+    MAX_IMPORT_BATCH_SIZE,
+    MAX_REPORTED_ERRORS,
+    IMPORT_FORMATS,
+    iter_records,
+)
+from app.search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_contacts_query
+from app.lookup import (
+    DEFAULT_LOOKUP_LIMIT,
+    MAX_LOOKUP_LIMIT,
+    lookup_contacts_query,
+    normalize_email,
+    normalize_phone,
 )
-from app.cloudinary_config import upload_photo
+from app.metrics import TimedRoute
+from app.etags import (
+    contact_etag,
+    etag_matches,
+    if_match_version,
+    list_etag,
+    not_modified,
+    precondition_failed,
+)
+from app import crud
+from app.response_cache import json_response, response_cache
+from app.serialization import (
+    as_dicts,
+    dump,
+    dump_row,
+    dump_rows,
+    project,
+    select_fields,
+)
+from app.query_log import slow_query_log
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 def parse_date(date_str: str) -> datetime:
@@ -46,6 +123,13 @@ def parse_date(date_str: str) -> datetime:
     raise ValueError(f"Неверный формат даты: {date_str}")
 
 
+def parse_fields(schema, fields: Optional[str]) -> Optional[list]:
+    try:
+        return select_fields(schema, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post(
     "/register/",
     response_model=UserRegisterResponse,
@@ -53,33 +137,31 @@ def parse_date(date_str: str) -> datetime:
     response_model_exclude_unset=True,
 )
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(User).where(
-            (User.email == user.email) | (User.username == user.username)
-        )
+    user_exists_error = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="This User already exists. Go to Login page.",
     )
-    existing_user = result.scalar_one_or_none()
 
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="This User already exists. Go to Login page.",
-        )
+    # Not authoritative, the insert below is; this only spares hashing a
+    # password for a sign-up that is bound to fail.
+    if await crud.user_exists(db, user.username, user.email):
+        raise user_exists_error
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
 
-    new_user = User(
-        id=uuid4(),
+    new_user = await crud.create_user(
+        db,
         username=user.username,
         email=user.email,
         password=hashed_password,
         first_name=user.first_name,
         last_name=user.last_name,
     )
+    if new_user is None:
+        raise user_exists_error
 
-    db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
+    await mark_write(new_user.id)
 
     return UserRegisterResponse(
         message="User registered successfully.",
@@ -92,11 +174,24 @@ async def login(user_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.username == user_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(user_data.password, user.password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
+        )
+
+    is_valid, new_hash = await verify_and_update_password(
+        user_data.password, user.password
+    )
+
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
         )
 
+    if new_hash:
+        await crud.update_user_password(db, user.id, new_hash)
+        await db.commit()
+
     access_token = create_access_token({"sub": str(user.id)})
     return LoginResponse(access_token=access_token)
 
@@ -108,15 +203,16 @@ async def login(user_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     response_model_exclude_unset=True,
 )
 async def create_contact(
+    response: Response,
     contact: ContactCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_creation_limiter, str(current_user.id))
+    await check_rate_limit(contact_creation_limiter, str(current_user.id), response)
 
-    new_contact = Contact(
-        id=uuid4(),
-        user_id=current_user.id,
+    new_contact = await crud.create_contact(
+        db,
+        current_user.id,
         first_name=contact.first_name,
         last_name=contact.last_name,
         email=contact.email,
@@ -124,14 +220,132 @@ async def create_contact(
         birthdate=parse_date(contact.birthdate),
         description=contact.description,
     )
-
-    db.add(new_contact)
     await db.commit()
-    await db.refresh(new_contact)
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
 
+    response.headers["ETag"] = contact_etag(new_contact.id, new_contact.updated_at)
     return ContactResponse.model_validate(new_contact)
 
 
+@router.post("/contacts/import", response_model=ContactImportResponse)
+async def import_contacts(
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+    mode: str = Query("atomic", pattern="^(atomic|chunked)$"),
+    skip: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import contacts from a CSV (with a header row) or NDJSON request body.
+
+    The body is read as a stream and valid rows are inserted with one
+    multi-row INSERT per batch. In atomic mode everything is committed at
+    the end; in chunked mode every batch is committed as it is written and
+    an interrupted import can be resumed by passing the reported last_row
+    as skip. If a later batch fails, the 503 response reports the rows
+    already committed in X-Imported-Count and X-Last-Row. Invalid rows are
+    skipped and listed in the error report.
+    """
+    await check_rate_limit(contact_import_limiter, str(current_user.id), response)
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    format = format or IMPORT_FORMATS.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=",
+        )
+
+    imported = failed = row_number = 0
+    committed, committed_row = 0, skip
+    errors: List[ContactImportError] = []
+    batch: List[dict] = []
+
+    async def flush():
+        nonlocal imported, committed, committed_row
+        if batch:
+            last_seq = await crud.reserve_change_seqs(db, current_user.id, len(batch))
+            for change_seq, row in enumerate(batch, last_seq - len(batch) + 1):
+                row["change_seq"] = change_seq
+            await db.execute(insert(Contact), batch)
+            imported += len(batch)
+            batch.clear()
+        if mode == "chunked":
+            await db.commit()
+            committed, committed_row = imported, row_number
+            await response_cache.invalidate_user(current_user.id)
+
+    try:
+        async for record in iter_records(request.stream(), format):
+            row_number += 1
+            if row_number <= skip:
+                continue
+
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                contact = ContactCreate.model_validate(record)
+                birthdate = parse_date(contact.birthdate)
+            except ValidationError as e:
+                error = "; ".join(
+                    ": ".join(
+                        filter(None, (".".join(map(str, err["loc"])), err["msg"]))
+                    )
+                    for err in e.errors()
+                )
+            except ValueError as e:
+                error = str(e)
+            else:
+                batch.append(
+                    {
+                        "id": uuid4(),
+                        "user_id": current_user.id,
+                        "first_name": contact.first_name,
+                        "last_name": contact.last_name,
+                        "email": contact.email,
+                        "phone": contact.phone,
+                        "birthdate": birthdate,
+                        "description": contact.description,
+                    }
+                )
+                if len(batch) >= batch_size:
+                    await flush()
+                continue
+
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(ContactImportError(row=row_number, error=error))
+
+        await flush()
+    except (SQLAlchemyError, ClientDisconnect):
+        if mode == "atomic":
+            raise
+        await db.rollback()
+        await mark_write(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=(
+                f"Import interrupted: {committed} contacts up to row "
+                f"{committed_row} were committed; resume with skip={committed_row}"
+            ),
+            headers={
+                "X-Imported-Count": str(committed),
+                "X-Last-Row": str(committed_row),
+            },
+        )
+    await db.commit()
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+
+    return ContactImportResponse(
+        imported=imported, failed=failed, last_row=row_number, errors=errors
+    )
+
+
 @router.post("/upload-photo/", response_model=PhotoUploadResponse)
 async def upload_user_photo(
     file: UploadFile = File(...), current_user: User = Depends(get_current_user)
@@ -142,15 +356,27 @@ async def upload_user_photo(
             status_code=status.HTTP_400_BAD_REQUEST, detail="File must be an image"
         )
 
+    if file.size is not None and file.size > MAX_PHOTO_SIZE:
+        await file.close()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Photo exceeds the maximum size of {MAX_PHOTO_SIZE} bytes",
+        )
+
     try:
-        contents = await file.read()
-        photo_url, public_id = upload_photo(contents, folder=f"users/{current_user.id}")
+        photo_url, public_id = await run_in_threadpool(
+            upload_photo, file.file, folder=f"users/{current_user.id}"
+        )
 
         return PhotoUploadResponse(
             message="Photo uploaded successfully",
             photo_url=photo_url,
             public_id=public_id,
         )
+    except PhotoTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
@@ -166,75 +392,396 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 @router.get("/contacts/", response_model=List[ContactResponse])
 async def get_contacts(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Contact).where(Contact.user_id == current_user.id))
-    contacts = result.scalars().all()
-    return [ContactResponse.model_validate(contact) for contact in contacts]
+    selected = parse_fields(ContactResponse, fields)
+    fields_param = ",".join(selected) if selected is not None else None
+
+    if not stream:
+        cache_key = await response_cache.list_key(
+            current_user.id, "contacts", request.base_url, limit, cursor, fields_param
+        )
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return cached.to_response(response, if_none_match)
+
+    # Every write to the user's contacts bumps change_seq.
+    version = await db.execute(
+        select(User.change_seq).where(User.id == current_user.id)
+    )
+    etag = list_etag(
+        current_user.id, version.one(), limit, cursor, stream, fields_param
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, response)
+
+    query = (
+        select(Contact)
+        .where(Contact.user_id == current_user.id)
+        .order_by(Contact.created_at, Contact.id)
+    )
+
+    if cursor:
+        try:
+            created_at, contact_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(
+            tuple_(Contact.created_at, Contact.id) > tuple_(created_at, contact_id)
+        )
+
+    if stream:
+        return StreamingResponse(
+            stream_json_array(project(query, ContactResponse, selected), bind=db.bind),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+
+    # created_at and id feed the next cursor even when not requested.
+    result = await db.execute(
+        project(query, ContactResponse, selected, extra=("created_at",)).limit(
+            limit + 1
+        )
+    )
+    contacts = result.all()
+
+    headers = {"ETag": etag}
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        next_cursor = encode_cursor(contacts[-1].created_at, contacts[-1].id)
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    body = dump_rows(contacts, selected)
+    await response_cache.set(cache_key, body, headers)
+    return json_response(body, response, headers)
 
 
 @router.get("/contacts/search", response_model=List[ContactSearchResponse])
 async def search_contacts(
+    response: Response,
     query: str,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_search_limiter, str(current_user.id))
+    await check_rate_limit(contact_search_limiter, str(current_user.id), response)
+    selected = parse_fields(ContactSearchResponse, fields)
 
-    result = await db.execute(
-        select(Contact).where(
-            Contact.user_id == current_user.id,
-            (Contact.first_name.ilike(f"%{query}%"))
-            | (Contact.last_name.ilike(f"%{query}%"))
-            | (Contact.phone.ilike(f"%{query}%"))
-            | (Contact.email.ilike(f"%{query}%")),
-        )
+    if not query.strip():
+        return []
+
+    statement = search_contacts_query(
+        current_user.id, query, db.bind.dialect.name, limit
     )
-    contacts = result.scalars().all()
-    return [ContactSearchResponse.model_validate(contact) for contact in contacts]
+    result = await db.execute(project(statement, ContactSearchResponse, selected))
+    return json_response(dump_rows(result.all()), response)
 
 
 @router.get("/contacts/birthdays", response_model=List[UpcomingBirthdayResponse])
 async def get_upcoming_birthdays(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    response: Response,
+    days: int = Query(DEFAULT_BIRTHDAY_WINDOW_DAYS, ge=0, le=MAX_BIRTHDAY_WINDOW_DAYS),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    today = date.today()
+    cache_key = await response_cache.birthdays_key(current_user.id, today, days)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(response)
+
+    statement = upcoming_birthdays_query(current_user.id, today, days)
+    result = await db.execute(project(statement, UpcomingBirthdayResponse))
+    body = dump_rows(result.all())
+    await response_cache.set(cache_key, body)
+    return json_response(body, response)
+
+
+@router.get("/contacts/lookup", response_model=List[ContactResponse])
+async def lookup_contacts(
+    response: Response,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    prefix: bool = False,
+    limit: int = Query(DEFAULT_LOOKUP_LIMIT, ge=1, le=MAX_LOOKUP_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_general_limiter, str(current_user.id))
+    """
+    Caller-ID style lookup by phone or email. Phones are compared by their
+    digits only and emails case-insensitively; with prefix=true the value
+    only has to be a prefix.
+    """
+    await check_rate_limit(contact_search_limiter, str(current_user.id), response)
+
+    if (phone is None) == (email is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Pass exactly one of phone and email",
+        )
+    if phone is not None and not normalize_phone(phone):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="phone has no digits",
+        )
+    if email is not None and not normalize_email(email):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="email is empty"
+        )
 
-    today = datetime.today().date()
-    next_week = today + timedelta(days=7)
+    statement = lookup_contacts_query(
+        current_user.id, db.bind.dialect.name, phone, email, prefix, limit
+    )
+    result = await db.execute(project(statement, ContactResponse))
+    return json_response(dump_rows(result.all()), response)
 
-    result = await db.execute(
-        select(Contact).where(
-            Contact.user_id == current_user.id,
-            func.date(Contact.birthdate) >= today,
-            func.date(Contact.birthdate) <= next_week,
+
+@router.get("/contacts/changes", response_model=ContactChangesResponse)
+async def get_contact_changes(
+    response: Response,
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Contacts created or updated, and ids of contacts deleted, after the
+    since cursor, in change order. Pass the returned cursor as since to get
+    the next changes; has_more means another page is already waiting.
+    """
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    changed = await db.execute(
+        project(
+            select(Contact)
+            .where(Contact.user_id == current_user.id, Contact.change_seq > since)
+            .order_by(Contact.change_seq),
+            ContactResponse,
+            extra=("change_seq",),
+        ).limit(limit + 1)
+    )
+    deleted = await db.execute(
+        select(ContactTombstone.contact_id, ContactTombstone.change_seq)
+        .where(
+            ContactTombstone.user_id == current_user.id,
+            ContactTombstone.change_seq > since,
         )
+        .order_by(ContactTombstone.change_seq)
+        .limit(limit + 1)
+    )
+    changes = sorted([*changed.all(), *deleted.all()], key=lambda row: row.change_seq)
+
+    page = changes[:limit]
+    changed = [row for row in page if "contact_id" not in row._fields]
+    body = dump(
+        {
+            "changed": as_dicts(changed, list(ContactResponse.model_fields)),
+            "deleted": [row.contact_id for row in page if "contact_id" in row._fields],
+            "cursor": page[-1].change_seq if page else since,
+            "has_more": len(changes) > limit,
+        }
+    )
+    return json_response(body, response)
+
+
+@router.get("/contacts/export")
+async def export_contacts(
+    response: Response,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    query = (
+        select(Contact)
+        .where(Contact.user_id == current_user.id)
+        .order_by(Contact.created_at, Contact.id)
+    )
+    partitions = stream_partitions(project(query, ContactResponse), bind=db.bind)
+    if format == "csv":
+        chunks = csv_chunks(partitions, ContactResponse)
+    else:
+        chunks = ndjson_chunks(partitions)
+
+    media_type, extension = EXPORT_FORMATS[format]
+    headers = dict(response.headers)
+    headers["Content-Disposition"] = f'attachment; filename="contacts.{extension}"'
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+async def fetch_contacts(db: AsyncSession, user_id: UUID, ids: List[UUID]) -> dict:
+    """The user's contacts among ids, keyed by id, in one query."""
+    query = select(Contact).where(
+        crud.contact_id_in(db, ids), Contact.user_id == user_id
+    )
+    result = await db.execute(project(query, ContactResponse, extra=("updated_at",)))
+    return {row.id: row for row in result}
+
+
+def batch_result(contact_id: UUID, contact) -> ContactBatchResult:
+    if contact is None:
+        return ContactBatchResult(
+            id=contact_id, status=status.HTTP_404_NOT_FOUND, error="Contact not found"
+        )
+    return ContactBatchResult(
+        id=contact_id,
+        status=status.HTTP_200_OK,
+        contact=ContactResponse.model_validate(contact),
+        etag=contact_etag(contact.id, contact.updated_at),
+    )
+
+
+@router.post("/contacts/batch/get", response_model=ContactBatchResponse)
+async def batch_get_contacts(
+    response: Response,
+    batch: ContactBatchIds,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Fetch up to MAX_CONTACT_BATCH_SIZE contacts, with a result per id."""
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    contacts = await fetch_contacts(db, current_user.id, batch.ids)
+    return ContactBatchResponse(
+        results=[batch_result(id, contacts.get(id)) for id in batch.ids]
+    )
+
+
+@router.patch("/contacts/batch", response_model=ContactBatchResponse)
+async def batch_update_contacts(
+    response: Response,
+    batch: ContactBatchPatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Partially update up to MAX_CONTACT_BATCH_SIZE contacts: each item sets
+    only the fields it contains. Returns a result per item, with the stored
+    contact or the reason it was not updated.
+    """
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    patches, errors = [], {}
+    for position, item in enumerate(batch.items):
+        values = item.model_dump(exclude_unset=True)
+        if values.get("birthdate") is not None:
+            try:
+                values["birthdate"] = parse_date(values["birthdate"])
+            except ValueError as e:
+                errors[position] = str(e)
+                continue
+        patches.append(values)
+
+    await crud.patch_contacts(db, current_user.id, patches)
+    contacts = await fetch_contacts(db, current_user.id, [p["id"] for p in patches])
+    await db.commit()
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+
+    results = []
+    for position, item in enumerate(batch.items):
+        if position in errors:
+            results.append(
+                ContactBatchResult(
+                    id=item.id,
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    error=errors[position],
+                )
+            )
+        else:
+            results.append(batch_result(item.id, contacts.get(item.id)))
+    return ContactBatchResponse(results=results)
+
+
+@router.post("/contacts/batch/delete", response_model=ContactBatchResponse)
+async def batch_delete_contacts(
+    response: Response,
+    batch: ContactBatchIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Delete up to MAX_CONTACT_BATCH_SIZE contacts, with a result per id."""
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    deleted = set(await crud.delete_contacts(db, current_user.id, batch.ids))
+    await db.commit()
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+
+    return ContactBatchResponse(
+        results=[
+            (
+                ContactBatchResult(id=id, status=status.HTTP_204_NO_CONTENT)
+                if id in deleted
+                else ContactBatchResult(
+                    id=id, status=status.HTTP_404_NOT_FOUND, error="Contact not found"
+                )
+            )
+            for id in batch.ids
+        ]
     )
-    contacts = result.scalars().all()
-    return [UpcomingBirthdayResponse.model_validate(contact) for contact in contacts]
 
 
 @router.get("/contacts/{contact_id}", response_model=ContactResponse)
 async def get_contact(
+    response: Response,
     contact_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_general_limiter, str(current_user.id))
-
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+    selected = parse_fields(ContactResponse, fields)
+
+    # Only the full representation is cached; sparse ones are cut from it.
+    cache_key = await response_cache.contact_key(current_user.id, contact_id)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        if selected is not None:
+            cached = cached.select(selected)
+        return cached.to_response(response, if_none_match)
+
+    query = select(Contact).where(
+        Contact.id == contact_id, Contact.user_id == current_user.id
+    )
     result = await db.execute(
-        select(Contact).where(
-            Contact.id == contact_id, Contact.user_id == current_user.id
-        )
+        project(query, ContactResponse, selected, extra=("updated_at",))
     )
-    contact = result.scalar_one_or_none()
+    contact = result.one_or_none()
 
     if not contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
 
-    return ContactResponse.model_validate(contact)
+    etag = contact_etag(contact.id, contact.updated_at, selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, response)
+
+    body = dump_row(contact, selected or list(ContactResponse.model_fields))
+    if selected is None:
+        await response_cache.set(cache_key, body, {"ETag": etag})
+    return json_response(body, response, {"ETag": etag})
 
 
 @router.put(
@@ -243,56 +790,140 @@ async def get_contact(
     response_model_exclude_unset=True,
 )
 async def update_contact(
+    response: Response,
     contact_id: UUID,
     updated_contact: ContactCreate,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_general_limiter, str(current_user.id))
-
-    result = await db.execute(
-        select(Contact).where(
-            Contact.id == contact_id, Contact.user_id == current_user.id
-        )
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    expected_version = if_match_version(if_match, contact_id)
+    contact = await crud.update_contact(
+        db,
+        current_user.id,
+        contact_id,
+        expected_version,
+        first_name=updated_contact.first_name,
+        last_name=updated_contact.last_name,
+        phone=updated_contact.phone,
+        birthdate=parse_date(updated_contact.birthdate),
+        description=updated_contact.description,
     )
-    contact = result.scalar_one_or_none()
 
     if not contact:
+        if expected_version and await crud.contact_exists(
+            db, current_user.id, contact_id
+        ):
+            raise precondition_failed()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
 
-    contact.first_name = updated_contact.first_name
-    contact.last_name = updated_contact.last_name
-    contact.phone = updated_contact.phone
-    contact.birthdate = parse_date(updated_contact.birthdate)
-    contact.description = updated_contact.description
-
     await db.commit()
-    await db.refresh(contact)
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+
+    response.headers["ETag"] = contact_etag(contact.id, contact.updated_at)
 
     return ContactResponse.model_validate(contact)
 
 
+@router.patch("/contacts/{contact_id}", response_model=ContactResponse)
+async def patch_contact(
+    response: Response,
+    contact_id: UUID,
+    patch: ContactPatch,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Update only the fields present in the body. When they already have the
+    given values nothing is written and the stored contact is returned.
+    """
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
+
+    expected_version = if_match_version(if_match, contact_id)
+    values = patch.model_dump(exclude_unset=True)
+    if values.get("birthdate") is not None:
+        try:
+            values["birthdate"] = parse_date(values["birthdate"])
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+            )
+
+    contact = None
+    if values:
+        contact = await crud.update_contact(
+            db,
+            current_user.id,
+            contact_id,
+            expected_version,
+            skip_unchanged=True,
+            **values,
+        )
+
+    if not contact:
+        # Nothing was written: the contact is missing, has been modified
+        # since If-Match, or already has these values. Release the change
+        # sequence lock without committing.
+        await db.rollback()
+        result = await db.execute(
+            select(Contact).where(
+                Contact.id == contact_id, Contact.user_id == current_user.id
+            )
+        )
+        contact = result.scalar_one_or_none()
+        if not contact:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
+            )
+        if expected_version and contact.updated_at != expected_version:
+            raise precondition_failed()
+    else:
+        await db.commit()
+        await mark_write(current_user.id)
+        await response_cache.invalidate_user(current_user.id)
+
+    response.headers["ETag"] = contact_etag(contact.id, contact.updated_at)
+    return ContactResponse.model_validate(contact)
+
+
 @router.delete("/contacts/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_contact(
+    response: Response,
     contact_id: UUID,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    await check_rate_limit(contact_general_limiter, str(current_user.id))
+    await check_rate_limit(contact_general_limiter, str(current_user.id), response)
 
-    result = await db.execute(
-        select(Contact).where(
-            Contact.id == contact_id, Contact.user_id == current_user.id
-        )
+    expected_version = if_match_version(if_match, contact_id)
+    deleted_id = await crud.delete_contact(
+        db, current_user.id, contact_id, expected_version
     )
-    contact = result.scalar_one_or_none()
 
-    if not contact:
+    if not deleted_id:
+        if expected_version and await crud.contact_exists(
+            db, current_user.id, contact_id
+        ):
+            raise precondition_failed()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
 
-    await db.delete(contact)
     await db.commit()
+    await mark_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+
+
+@router.get("/admin/slow-queries", response_model=List[SlowQueryResponse])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    admin: User = Depends(get_admin_user),
+):
+    return slow_query_log.recent(limit)
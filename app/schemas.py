@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from uuid import UUID
 from typing import Optional, List
 from datetime import datetime
 
+MAX_CONTACT_BATCH_SIZE = 500
+
 
 class UserCreate(BaseModel):
     username: str
@@ -90,6 +92,80 @@ class UpcomingBirthdayResponse(BaseModel):
         from_attributes = True
 
 
+class ContactImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ContactImportResponse(BaseModel):
+    imported: int
+    failed: int
+    last_row: int
+    errors: List[ContactImportError]
+
+
+class ContactPatch(BaseModel):
+    """Partial contact update: only the fields that are set are written."""
+
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    birthdate: Optional[str] = None
+    description: Optional[str] = None
+
+    @field_validator("first_name", "last_name", "email", "phone", "birthdate")
+    @classmethod
+    def not_null(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
+class ContactBatchPatch(ContactPatch):
+    id: UUID
+
+
+class ContactBatchIds(BaseModel):
+    ids: List[UUID] = Field(max_length=MAX_CONTACT_BATCH_SIZE)
+
+
+class ContactBatchPatchRequest(BaseModel):
+    items: List[ContactBatchPatch] = Field(max_length=MAX_CONTACT_BATCH_SIZE)
+
+
+class ContactBatchResult(BaseModel):
+    id: UUID
+    status: int
+    contact: Optional[ContactResponse] = None
+    etag: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ContactBatchResponse(BaseModel):
+    results: List[ContactBatchResult]
+
+
+class ContactChangesResponse(BaseModel):
+    changed: List[ContactResponse]
+    deleted: List[UUID]
+    cursor: int
+    has_more: bool
+
+
+class SlowQueryResponse(BaseModel):
+    fingerprint: str
+    statement: str
+    parameters: list
+    duration_ms: float
+    route: Optional[str]
+    recorded_at: datetime
+    plan: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
 class PhotoUploadResponse(BaseModel):
     message: str
     photo_url: str
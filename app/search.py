@@ -0,0 +1,47 @@
+from uuid import UUID
+
+from sqlalchemy.sql import Select, func, literal, select
+
+from app.models import Contact
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def build_prefix_tsquery(query: str) -> str:
+    """
+    Turn free-form user input into a to_tsquery() expression where every
+    whitespace-separated term must match as a prefix, e.g.
+    "ivan +380" -> "'ivan':* & '+380':*".
+    Terms are quoted so that no user input is parsed as tsquery syntax.
+    """
+    terms = []
+    for term in query.lower().split():
+        escaped = term.replace("\\", "\\\\").replace("'", "''")
+        terms.append(f"'{escaped}':*")
+    return " & ".join(terms)
+
+
+def search_contacts_query(
+    user_id: UUID, query: str, dialect: str, limit: int = DEFAULT_SEARCH_LIMIT
+) -> Select:
+    """
+    Build the contact search statement for the given SQL dialect.
+
+    On PostgreSQL the GIN-indexed search_vector is matched with a prefix
+    tsquery and results are ranked by ts_rank. Other dialects fall back to
+    matching every term as the prefix of a space-separated word of the
+    lower-cased search text, ordered by name.
+    """
+    statement = select(Contact).where(Contact.user_id == user_id).limit(limit)
+
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", build_prefix_tsquery(query))
+        return statement.where(Contact.search_vector.bool_op("@@")(ts_query)).order_by(
+            func.ts_rank(Contact.search_vector, ts_query).desc(), Contact.id
+        )
+
+    words = literal(" ").concat(Contact.search_vector)
+    for term in query.lower().split():
+        statement = statement.where(words.contains(f" {term}", autoescape=True))
+    return statement.order_by(Contact.last_name, Contact.first_name, Contact.id)
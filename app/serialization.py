@@ -0,0 +1,86 @@
+from typing import Iterable, Optional, Type
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+
+from app.models import Contact
+
+
+def select_fields(schema: Type[BaseModel], fields: Optional[str]) -> Optional[list]:
+    """
+    Parse a ?fields= value into the schema fields to return, in schema order
+    and always including id. None means every field.
+    Raises ValueError for names the schema does not have.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in schema.model_fields if name == "id" or name in requested]
+
+
+def schema_columns(
+    schema: Type[BaseModel], fields: Optional[list] = None, extra: tuple = ()
+) -> list:
+    """
+    The Contact columns behind the fields of a response schema (or the
+    given subset of them), in order, followed by any extra columns needed
+    internally.
+    """
+    names = list(fields or schema.model_fields)
+    names += [name for name in extra if name not in names]
+    return [getattr(Contact, name) for name in names]
+
+
+def project(
+    query: Select,
+    schema: Type[BaseModel],
+    fields: Optional[list] = None,
+    extra: tuple = (),
+) -> Select:
+    """
+    Select only the columns the response schema needs instead of whole
+    Contact entities, keeping the query's filters and ordering.
+    """
+    return query.with_only_columns(*schema_columns(schema, fields, extra))
+
+
+def _default(value):
+    # asyncpg returns its own UUID subclass, which orjson does not serialize.
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError
+
+
+def _as_dict(row: Row, fields: Optional[list]) -> dict:
+    if fields is None:
+        return row._asdict()
+    return {name: getattr(row, name) for name in fields}
+
+
+def dump_row(row: Row, fields: Optional[list] = None) -> bytes:
+    return orjson.dumps(_as_dict(row, fields), default=_default)
+
+
+def dump_rows(rows: Iterable[Row], fields: Optional[list] = None) -> bytes:
+    """
+    Serialize projected rows to a JSON array in one pass, keeping only
+    fields when given. The rows come from the database, so they are not
+    validated against the schema again.
+    """
+    return dump(as_dicts(rows, fields))
+
+
+def as_dicts(rows: Iterable[Row], fields: Optional[list] = None) -> list:
+    """Projected rows as dicts for dump, keeping only fields when given."""
+    return [_as_dict(row, fields) for row in rows]
+
+
+def dump(value) -> bytes:
+    """Serialize a JSON value that may contain projected rows from as_dicts."""
+    return orjson.dumps(value, default=_default)
@@ -0,0 +1,176 @@
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+from app import cloudinary_config
+
+load_dotenv()
+
+PHOTO_STORAGE_BACKEND = os.getenv("PHOTO_STORAGE_BACKEND", "cloudinary")
+PHOTO_STORAGE_DIR = os.getenv("PHOTO_STORAGE_DIR", "media")
+PHOTO_BASE_URL = os.getenv("PHOTO_BASE_URL", "/media")
+MAX_PHOTO_SIZE = int(os.getenv("MAX_PHOTO_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Cloudinary rejects chunks under 5 MB other than the last one.
+CLOUDINARY_CHUNK_SIZE = int(os.getenv("CLOUDINARY_CHUNK_SIZE", str(6 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the photo.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class PhotoTooLarge(Exception):
+    pass
+
+
+class SizeLimitedReader:
+    """
+    File-like wrapper that raises PhotoTooLarge as soon as more than max_size
+    bytes have been read, so oversized uploads are rejected mid-stream.
+    """
+
+    def __init__(self, file: BinaryIO, max_size: int):
+        self.file = file
+        self.max_size = max_size
+        self.bytes_read = 0
+        self.name = getattr(file, "name", None)
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_size:
+            raise PhotoTooLarge(
+                f"Photo exceeds the maximum size of {self.max_size} bytes"
+            )
+        return chunk
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.file.seek(offset, whence)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # The caller owns the underlying file and closes it.
+        return None
+
+    @property
+    def exceeded(self) -> bool:
+        return self.bytes_read > self.max_size
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def upload_photo(self, file: BinaryIO, folder: str) -> tuple[str, str]:
+        """
+        Store a photo read from a file-like object.
+        Returns: tuple of (photo_url, public_id)
+        """
+
+
+class CloudinaryStorage(StorageBackend):
+    def upload_photo(self, file: BinaryIO, folder: str) -> tuple[str, str]:
+        return cloudinary_config.upload_photo(
+            file, folder=folder, chunk_size=CLOUDINARY_CHUNK_SIZE
+        )
+
+
+class LocalStorage(StorageBackend):
+    """Stores photos on the local filesystem, for development and benchmarks."""
+
+    def __init__(self, root: str = PHOTO_STORAGE_DIR, base_url: str = PHOTO_BASE_URL):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def upload_photo(self, file: BinaryIO, folder: str) -> tuple[str, str]:
+        public_id = f"{folder}/{uuid4().hex}"
+        path = self.root / public_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with open(path, "wb") as destination:
+                shutil.copyfileobj(file, destination, UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        return f"{self.base_url}/{public_id}", public_id
+
+
+def get_storage_backend() -> StorageBackend:
+    if PHOTO_STORAGE_BACKEND == "local":
+        return LocalStorage()
+    return CloudinaryStorage()
+
+
+storage_backend = get_storage_backend()
+
+
+def upload_photo(
+    file: BinaryIO, folder: str = "contacts", max_size: int = MAX_PHOTO_SIZE
+) -> tuple[str, str]:
+    """
+    Stream a photo to the configured storage backend, enforcing max_size.
+    This blocks on network or disk I/O, so call it from a worker thread.
+    Returns: tuple of (photo_url, public_id)
+    """
+    reader = SizeLimitedReader(file, max_size)
+    try:
+        return storage_backend.upload_photo(reader, folder)
+    except Exception as e:
+        if reader.exceeded and not isinstance(e, PhotoTooLarge):
+            raise PhotoTooLarge(str(e)) from e
+        raise
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects request bodies larger than max_size sent to path with a 413
+    before the multipart form is parsed and spooled: up front when the
+    Content-Length says so, otherwise once that many bytes have arrived.
+    """
+
+    def __init__(self, app, path: str, max_size: int):
+        self.app = app
+        self.path = path
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the maximum size of {self.max_size} bytes"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self.max_size:
+                response = JSONResponse(
+                    {"detail": detail},
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail,
+                    )
+            return message
+
+        await self.app(scope, receive_limited, send)
@@ -0,0 +1,108 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def configure_app(env: dict) -> None:
+    """
+    Apply the settings the benchmarked app runs with and make it importable.
+    The app reads its settings at import time, so call this before importing it.
+    """
+    os.environ.update(env)
+    sys.path.insert(0, str(ROOT))
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(durations: Sequence[float], scale: float = 1000.0) -> dict:
+    """
+    Mean and p50/p95/p99 of durations given in seconds, converted with scale
+    (1000 for milliseconds, 1e6 for microseconds).
+    """
+    values = sorted(durations)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) * scale if values else 0.0,
+        "p50": percentile(values, 0.50) * scale,
+        "p95": percentile(values, 0.95) * scale,
+        "p99": percentile(values, 0.99) * scale,
+    }
+
+
+def run_metadata(**extra) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def write_results(path: str, results: dict) -> None:
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(
+    baseline: dict, current: dict, metrics: Sequence[str], tolerance: float
+) -> bool:
+    """
+    Print how every benchmark in current moved against baseline, for metrics
+    where lower is better. Returns False if any of them got slower by more
+    than tolerance (a fraction, e.g. 0.1 for 10%).
+    """
+    ok = True
+    for name, result in sorted(current["results"].items()):
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:40} (not in baseline)")
+            continue
+        changes = []
+        for metric in metrics:
+            before, after = previous.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            flag = ""
+            if change > tolerance:
+                flag, ok = " REGRESSION", False
+            changes.append(
+                f"{metric} {before:.3f} -> {after:.3f} ({change:+.1%}){flag}"
+            )
+        print(f"{name:40} " + "; ".join(changes))
+    return ok
+
+
+def exit_with_comparison(
+    baseline_path: str, current: dict, metrics: Sequence[str], tolerance: float
+) -> None:
+    if not compare(load_results(baseline_path), current, metrics, tolerance):
+        sys.exit(1)
@@ -0,0 +1,564 @@
+"""
+Load test for the API.
+
+Seeds a database with benchmark users and contacts, boots app.main:app
+under uvicorn against it and drives every route with concurrent clients,
+one route at a time. Throughput and p50/p95/p99 latency per route are
+written as JSON.
+
+    python -m benchmarks.load_test run --scale 100k --concurrency 50 \\
+        --output benchmarks/results/latest.json
+    python -m benchmarks.load_test run --baseline benchmarks/results/baseline.json
+    python -m benchmarks.load_test compare baseline.json latest.json
+
+The database URL defaults to BENCH_DATABASE_URL, then to a local SQLite
+file. The database is dropped and re-seeded unless --no-seed is given.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+import httpx
+
+from benchmarks.common import (
+    ROOT,
+    configure_app,
+    exit_with_comparison,
+    load_results,
+    run_metadata,
+    summarize,
+    write_results,
+)
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SEED_BATCH_SIZE = 5000
+PASSWORD = "benchmark-password"
+FIRST_NAMES = ["Olena", "Andrii", "Iryna", "Taras", "Maria", "Dmytro", "Sofia", "Ivan"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Melnyk", "Boyko"]
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+BATCH_SIZE = 50
+BATCH_DELETE_SIZE = 20
+
+
+def benchmark_env(args) -> dict:
+    """Settings shared by the seeding code in this process and the server."""
+    usernames = ",".join(f"bench-{i}" for i in range(args.users))
+    return {
+        **os.environ,
+        "DATABASE_URL": args.database_url,
+        "DATABASE_REPLICA_URLS": "",
+        "SECRET_KEY": os.getenv("SECRET_KEY", "benchmark-secret"),
+        # Keep the rate limiter on the request path without throttling.
+        "RATE_LIMIT_MULTIPLIER": "1000000",
+        "PHOTO_STORAGE_BACKEND": "local",
+        "PHOTO_STORAGE_DIR": args.media_dir,
+        "ADMIN_USERNAMES": usernames,
+    }
+
+
+def contact_row(rng: random.Random, user_id: UUID, number: int, users: int) -> dict:
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "id": uuid4(),
+        "user_id": user_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone": f"+380{rng.randrange(10**9):09d}",
+        "email": f"{first_name}.{last_name}.{number}@example.com".lower(),
+        "birthdate": datetime(
+            1960 + rng.randrange(45), rng.randint(1, 12), rng.randint(1, 28)
+        ),
+        "description": None,
+        "change_seq": number // users + 1,
+    }
+
+
+async def seed(contacts: int, users: int, rng: random.Random) -> None:
+    from sqlalchemy import insert
+
+    from app.auth import get_password_hash
+    from app.database import Base, async_engine
+    from app.models import Contact, User
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    password = get_password_hash(PASSWORD)
+    user_ids = [uuid4() for _ in range(users)]
+    async with async_engine.begin() as connection:
+        await connection.execute(
+            insert(User),
+            [
+                {
+                    "id": user_id,
+                    "username": f"bench-{i}",
+                    "email": f"bench-{i}@example.com",
+                    "password": password,
+                    "change_seq": len(range(i, contacts, users)),
+                }
+                for i, user_id in enumerate(user_ids)
+            ],
+        )
+
+    started = time.perf_counter()
+    for offset in range(0, contacts, SEED_BATCH_SIZE):
+        rows = [
+            contact_row(rng, user_ids[number % users], number, users)
+            for number in range(offset, min(offset + SEED_BATCH_SIZE, contacts))
+        ]
+        async with async_engine.begin() as connection:
+            await connection.execute(insert(Contact), rows)
+        print(f"seeded {offset + len(rows)}/{contacts} contacts", end="\r", flush=True)
+    print(f"seeded {contacts} contacts in {time.perf_counter() - started:.1f}s")
+    await async_engine.dispose()
+
+
+async def load_users() -> list[dict]:
+    """The seeded benchmark users with a fresh access token each."""
+    from sqlalchemy import select
+
+    from app.auth import create_access_token
+    from app.database import async_engine
+    from app.models import User
+
+    async with async_engine.connect() as connection:
+        result = await connection.execute(
+            select(User.id, User.username)
+            .where(User.username.like("bench-%"))
+            .order_by(User.username)
+        )
+        users = [
+            {
+                "id": user_id,
+                "username": username,
+                "headers": {
+                    "Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"
+                },
+                "contact_ids": [],
+            }
+            for user_id, username in result
+        ]
+    await async_engine.dispose()
+    return users
+
+
+@contextmanager
+def run_server(port: int, workers: int, env: dict):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/metrics").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("The API server did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def contact_payload(rng: random.Random) -> dict:
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "email": f"{uuid4().hex[:12]}@example.com",
+        "phone": f"+380{rng.randrange(10**9):09d}",
+        "birthdate": f"{1960 + rng.randrange(45)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+
+
+Call = Callable[[httpx.AsyncClient, dict, random.Random], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    call: Call
+    # Fraction of --requests to send, for routes much slower than the rest.
+    share: float = 1.0
+    prepare: Optional[
+        Callable[[httpx.AsyncClient, list, int, random.Random], Awaitable[None]]
+    ] = None
+
+
+async def register(client, user, rng):
+    name = f"load-{uuid4().hex}"
+    return await client.post(
+        "/register/",
+        json={"username": name, "email": f"{name}@example.com", "password": PASSWORD},
+    )
+
+
+async def login(client, user, rng):
+    return await client.post(
+        "/login/", json={"username": user["username"], "password": PASSWORD}
+    )
+
+
+async def create_contact(client, user, rng):
+    return await client.post(
+        "/contacts/", json=contact_payload(rng), headers=user["headers"]
+    )
+
+
+async def import_contacts(client, user, rng):
+    body = "\n".join(json.dumps(contact_payload(rng)) for _ in range(100))
+    return await client.post(
+        "/contacts/import",
+        content=body,
+        headers={**user["headers"], "Content-Type": "application/x-ndjson"},
+    )
+
+
+async def upload_photo(client, user, rng):
+    return await client.post(
+        "/upload-photo/",
+        files={"file": ("photo.jpg", rng.randbytes(32 * 1024), "image/jpeg")},
+        headers=user["headers"],
+    )
+
+
+async def get_me(client, user, rng):
+    return await client.get("/users/me/", headers=user["headers"])
+
+
+async def list_contacts(client, user, rng):
+    return await client.get("/contacts/", headers=user["headers"])
+
+
+async def stream_contacts(client, user, rng):
+    return await client.get(
+        "/contacts/", params={"stream": "true"}, headers=user["headers"]
+    )
+
+
+async def search_contacts(client, user, rng):
+    query = rng.choice(FIRST_NAMES + LAST_NAMES)[: rng.randint(3, 6)]
+    return await client.get(
+        "/contacts/search", params={"query": query}, headers=user["headers"]
+    )
+
+
+async def lookup_contacts(client, user, rng):
+    prefix = f"380{rng.randrange(10**4):04d}"
+    return await client.get(
+        "/contacts/lookup",
+        params={"phone": prefix, "prefix": "true"},
+        headers=user["headers"],
+    )
+
+
+async def upcoming_birthdays(client, user, rng):
+    return await client.get(
+        "/contacts/birthdays", params={"days": 30}, headers=user["headers"]
+    )
+
+
+async def contact_changes(client, user, rng):
+    return await client.get(
+        "/contacts/changes", params={"since": 0}, headers=user["headers"]
+    )
+
+
+async def export_contacts(client, user, rng):
+    return await client.get(
+        "/contacts/export", params={"format": "ndjson"}, headers=user["headers"]
+    )
+
+
+async def get_contact(client, user, rng):
+    contact_id = rng.choice(user["contact_ids"])
+    return await client.get(f"/contacts/{contact_id}", headers=user["headers"])
+
+
+async def batch_get_contacts(client, user, rng):
+    ids = rng.sample(user["contact_ids"], min(BATCH_SIZE, len(user["contact_ids"])))
+    return await client.post(
+        "/contacts/batch/get", json={"ids": ids}, headers=user["headers"]
+    )
+
+
+async def update_contact(client, user, rng):
+    contact_id = rng.choice(user["contact_ids"])
+    return await client.put(
+        f"/contacts/{contact_id}", json=contact_payload(rng), headers=user["headers"]
+    )
+
+
+async def patch_contact(client, user, rng):
+    contact_id = rng.choice(user["contact_ids"])
+    return await client.patch(
+        f"/contacts/{contact_id}",
+        json={"phone": contact_payload(rng)["phone"]},
+        headers=user["headers"],
+    )
+
+
+async def delete_contact(client, user, rng):
+    contact_id = user["deletable_ids"].pop()
+    return await client.delete(f"/contacts/{contact_id}", headers=user["headers"])
+
+
+async def batch_update_contacts(client, user, rng):
+    ids = rng.sample(user["contact_ids"], min(BATCH_SIZE, len(user["contact_ids"])))
+    items = [{"id": id, "phone": contact_payload(rng)["phone"]} for id in ids]
+    return await client.patch(
+        "/contacts/batch", json={"items": items}, headers=user["headers"]
+    )
+
+
+async def batch_delete_contacts(client, user, rng):
+    ids = [user["deletable_ids"].pop() for _ in range(BATCH_DELETE_SIZE)]
+    return await client.post(
+        "/contacts/batch/delete", json={"ids": ids}, headers=user["headers"]
+    )
+
+
+async def slow_queries(client, user, rng):
+    return await client.get("/admin/slow-queries", headers=user["headers"])
+
+
+async def prepare_deletes(client, users, total, rng, per_request=1):
+    """Create the contacts the delete scenario removes, outside the timed run."""
+    for number in range(total):
+        user = users[number % len(users)]
+        for _ in range(per_request):
+            response = await create_contact(client, user, rng)
+            response.raise_for_status()
+            user.setdefault("deletable_ids", []).append(response.json()["id"])
+
+
+async def prepare_batch_deletes(client, users, total, rng):
+    await prepare_deletes(client, users, total, rng, per_request=BATCH_DELETE_SIZE)
+
+
+SCENARIOS = [
+    Scenario("POST /register/", register, share=0.1),
+    Scenario("POST /login/", login, share=0.1),
+    Scenario("GET /users/me/", get_me),
+    Scenario("POST /contacts/", create_contact),
+    Scenario("POST /contacts/import", import_contacts, share=0.1),
+    Scenario("POST /upload-photo/", upload_photo, share=0.2),
+    Scenario("GET /contacts/", list_contacts),
+    Scenario("GET /contacts/?stream=true", stream_contacts, share=0.05),
+    Scenario("GET /contacts/search", search_contacts),
+    Scenario("GET /contacts/lookup", lookup_contacts),
+    Scenario("GET /contacts/birthdays", upcoming_birthdays),
+    Scenario("GET /contacts/changes", contact_changes),
+    Scenario("GET /contacts/export", export_contacts, share=0.05),
+    Scenario("GET /contacts/{contact_id}", get_contact),
+    Scenario("POST /contacts/batch/get", batch_get_contacts),
+    Scenario("PUT /contacts/{contact_id}", update_contact),
+    Scenario("PATCH /contacts/{contact_id}", patch_contact),
+    Scenario("DELETE /contacts/{contact_id}", delete_contact, prepare=prepare_deletes),
+    Scenario("PATCH /contacts/batch", batch_update_contacts),
+    Scenario(
+        "POST /contacts/batch/delete",
+        batch_delete_contacts,
+        share=0.1,
+        prepare=prepare_batch_deletes,
+    ),
+    Scenario("GET /admin/slow-queries", slow_queries, share=0.1),
+]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    users: list,
+    total: int,
+    concurrency: int,
+    rng: random.Random,
+) -> dict:
+    if scenario.prepare is not None:
+        await scenario.prepare(client, users, total, rng)
+
+    durations = []
+    statuses = Counter()
+    numbers = itertools.count()
+
+    async def worker():
+        while (number := next(numbers)) < total:
+            user = users[number % len(users)]
+            started = time.perf_counter()
+            try:
+                response = await scenario.call(client, user, rng)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latency = summarize(durations)
+    errors = sum(
+        count for status, count in statuses.items() if not status.startswith(("2", "3"))
+    )
+    return {
+        "requests": latency["count"],
+        "errors": errors,
+        "statuses": dict(statuses),
+        "throughput_rps": latency["count"] / elapsed if elapsed else 0.0,
+        "mean_ms": latency["mean"],
+        "p50_ms": latency["p50"],
+        "p95_ms": latency["p95"],
+        "p99_ms": latency["p99"],
+    }
+
+
+async def drive(base_url: str, users: list, args) -> dict:
+    rng = random.Random(args.seed)
+    selected = (
+        [name.strip() for name in args.routes.split(",")] if args.routes else None
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+        for user in users:
+            response = await client.get(
+                "/contacts/", params={"limit": 1000}, headers=user["headers"]
+            )
+            response.raise_for_status()
+            user["contact_ids"] = [contact["id"] for contact in response.json()]
+
+        results = {}
+        for scenario in SCENARIOS:
+            if selected and scenario.name not in selected:
+                continue
+            total = max(int(args.requests * scenario.share), 1)
+            results[scenario.name] = await run_scenario(
+                client, scenario, users, total, args.concurrency, rng
+            )
+            result = results[scenario.name]
+            print(
+                f"{scenario.name:32} {result['throughput_rps']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+                f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}"
+            )
+    return results
+
+
+def run(args) -> None:
+    contacts = SCALES.get(args.scale.lower()) or int(args.scale)
+    env = benchmark_env(args)
+    configure_app(env)
+
+    if not args.no_seed:
+        asyncio.run(seed(contacts, args.users, random.Random(args.seed)))
+    users = asyncio.run(load_users())
+    if not users:
+        sys.exit("No benchmark users found; run without --no-seed first")
+
+    with run_server(args.port, args.workers, env) as base_url:
+        results = asyncio.run(drive(base_url, users, args))
+
+    current = {
+        "meta": run_metadata(
+            database=args.database_url.split(":", 1)[0],
+            scale=contacts,
+            users=len(users),
+            concurrency=args.concurrency,
+            requests=args.requests,
+            workers=args.workers,
+        ),
+        "results": results,
+    }
+    write_results(args.output, current)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        exit_with_comparison(args.baseline, current, COMPARED_METRICS, args.tolerance)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser(
+        "run", help="seed, start the API and measure every route"
+    )
+    run_parser.add_argument(
+        "--database-url",
+        default=os.getenv(
+            "BENCH_DATABASE_URL",
+            f"sqlite+aiosqlite:///{ROOT / 'benchmarks' / 'bench.db'}",
+        ),
+    )
+    run_parser.add_argument(
+        "--scale", default="1k", help="1k, 100k, 1m or a number of contacts"
+    )
+    run_parser.add_argument("--users", type=int, default=10)
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument(
+        "--requests", type=int, default=1000, help="requests per route"
+    )
+    run_parser.add_argument("--routes", help="comma-separated scenario names to run")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--port", type=int, default=8765)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument(
+        "--no-seed", action="store_true", help="reuse the existing data"
+    )
+    run_parser.add_argument(
+        "--media-dir", default=os.path.join(tempfile.gettempdir(), "bench-media")
+    )
+    run_parser.add_argument("--output", default="benchmarks/results/latest.json")
+    run_parser.add_argument("--baseline", help="results file to compare against")
+    run_parser.add_argument("--tolerance", type=float, default=0.1)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        exit_with_comparison(
+            args.baseline, load_results(args.current), COMPARED_METRICS, args.tolerance
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Micro-benchmarks for code on the request path: rate limiting, date parsing,
+token decoding and response serialization. The serialization benchmarks
+compare the ORM + response_model path with column-projected rows dumped by
+orjson, over 10k rows in an in-memory SQLite database.
+
+    python -m benchmarks.micro --output benchmarks/results/micro.json
+    python -m benchmarks.micro --baseline benchmarks/results/micro-baseline.json
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List
+from uuid import uuid4
+
+from benchmarks.common import (
+    configure_app,
+    exit_with_comparison,
+    run_metadata,
+    summarize,
+    write_results,
+)
+
+COMPARED_METRICS = ("mean_us", "p95_us")
+
+
+def measure(function: Callable[[], object], iterations: int) -> dict:
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return timing_result(durations)
+
+
+async def measure_async(function: Callable[[], Awaitable], iterations: int) -> dict:
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await function()
+        durations.append(time.perf_counter() - started)
+    return timing_result(durations)
+
+
+def timing_result(durations: list) -> dict:
+    timing = summarize(durations, scale=1e6)
+    return {
+        "iterations": timing["count"],
+        "ops_per_sec": 1e6 / timing["mean"] if timing["mean"] else 0.0,
+        "mean_us": timing["mean"],
+        "p50_us": timing["p50"],
+        "p95_us": timing["p95"],
+        "p99_us": timing["p99"],
+    }
+
+
+def sample_contacts(count: int) -> list:
+    from app.models import Contact
+
+    return [
+        Contact(
+            id=uuid4(),
+            user_id=uuid4(),
+            first_name="Olena",
+            last_name="Shevchenko",
+            phone="+380501234567",
+            email=f"olena.{number}@example.com",
+            birthdate=datetime(1990, 5, 17),
+            description="Met at the conference",
+            created_at=datetime(2024, 1, 1, 12, 0),
+        )
+        for number in range(count)
+    ]
+
+
+def serialization_benchmarks(rows: int, iterations: int) -> dict:
+    import json
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import Session
+
+    from app.database import Base
+    from app.models import Contact, User
+    from app.schemas import ContactResponse
+    from app.serialization import dump_rows, project
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    user_id = uuid4()
+    session = Session(engine)
+    session.execute(
+        insert(User).values(
+            id=user_id, username="bench", email="bench@example.com", password="-"
+        )
+    )
+    session.execute(
+        insert(Contact),
+        [
+            {
+                "user_id": user_id,
+                "first_name": "Olena",
+                "last_name": "Shevchenko",
+                "phone": "+380501234567",
+                "email": f"olena.{number}@example.com",
+                "birthdate": datetime(1990, 5, 17),
+                "description": "Met at the conference " * 10,
+                "change_seq": number + 1,
+            }
+            for number in range(rows)
+        ],
+    )
+    query = select(Contact).where(Contact.user_id == user_id)
+    adapter = TypeAdapter(List[ContactResponse])
+
+    def response_model_path(contacts) -> bytes:
+        # Validate every ORM object, then let FastAPI validate against
+        # response_model again and render with json.dumps.
+        models = [ContactResponse.model_validate(contact) for contact in contacts]
+        value = adapter.dump_python(adapter.validate_python(models), mode="json")
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    contacts = session.scalars(query).all()
+    projected = session.execute(project(query, ContactResponse)).all()
+    label = f"{rows // 1000}k rows"
+    results = {
+        f"serialize {label}: ORM + response_model": measure(
+            lambda: response_model_path(contacts), iterations
+        ),
+        f"serialize {label}: projected rows + orjson": measure(
+            lambda: dump_rows(projected), iterations
+        ),
+        f"fetch + serialize {label}: ORM + response_model": measure(
+            lambda: response_model_path(session.scalars(query).all()), iterations
+        ),
+        f"fetch + serialize {label}: projected rows + orjson": measure(
+            lambda: dump_rows(session.execute(project(query, ContactResponse))),
+            iterations,
+        ),
+    }
+    session.close()
+    return results
+
+
+def run_benchmarks(iterations: int) -> dict:
+    from pydantic import TypeAdapter
+
+    from app.auth import create_access_token, get_token_user_id
+    from app.rate_limit import MemoryRateLimitStore, RateLimiter
+    from app.routes import parse_date
+    from app.schemas import ContactResponse
+
+    results = {}
+
+    async def rate_limiter_benchmarks():
+        users = [str(uuid4()) for _ in range(10000)]
+        allowed = RateLimiter(10**9, "bench", MemoryRateLimitStore())
+        positions = iter(range(10**12))
+        results["rate_limiter.is_rate_limited (allowed)"] = await measure_async(
+            lambda: allowed.is_rate_limited(users[next(positions) % len(users)]),
+            iterations,
+        )
+        limited = RateLimiter(1, "bench", MemoryRateLimitStore())
+        results["rate_limiter.is_rate_limited (limited)"] = await measure_async(
+            lambda: limited.is_rate_limited(users[0]), iterations
+        )
+
+    asyncio.run(rate_limiter_benchmarks())
+
+    results["parse_date (%Y-%m-%d)"] = measure(
+        lambda: parse_date("1990-05-17"), iterations
+    )
+    results["parse_date (%m/%d/%Y)"] = measure(
+        lambda: parse_date("05/17/1990"), iterations
+    )
+
+    token = create_access_token({"sub": str(uuid4())})
+    results["get_token_user_id"] = measure(lambda: get_token_user_id(token), iterations)
+
+    contact = sample_contacts(1)[0]
+    results["ContactResponse (1 row)"] = measure(
+        lambda: ContactResponse.model_validate(contact).model_dump_json(), iterations
+    )
+    contacts = sample_contacts(100)
+    page = TypeAdapter(List[ContactResponse])
+    results["List[ContactResponse] (100 rows)"] = measure(
+        lambda: page.dump_json(
+            [ContactResponse.model_validate(contact) for contact in contacts]
+        ),
+        max(iterations // 100, 10),
+    )
+
+    results.update(serialization_benchmarks(10000, max(iterations // 1000, 5)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--output", default="benchmarks/results/micro.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Importing the app needs these settings; the app's database is never used.
+    configure_app(
+        {
+            "DATABASE_URL": os.getenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:"),
+            "SECRET_KEY": os.getenv("SECRET_KEY", "benchmark-secret"),
+        }
+    )
+
+    results = run_benchmarks(args.iterations)
+    for name, result in results.items():
+        print(
+            f"{name:52} {result['ops_per_sec']:12.0f} ops/s  "
+            f"mean {result['mean_us']:8.2f} us  p95 {result['p95_us']:8.2f} us"
+        )
+
+    current = {"meta": run_metadata(iterations=args.iterations), "results": results}
+    write_results(args.output, current)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        exit_with_comparison(args.baseline, current, COMPARED_METRICS, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
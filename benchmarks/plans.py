@@ -0,0 +1,170 @@
+"""
+Query plan check for the API.
+
+Seeds a PostgreSQL database at scale, drives every load test scenario once
+against the app in-process and records the statements each route runs.
+Every statement is then explained, and the check fails if a plan reads a
+large table (see --min-rows) with a sequential scan.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://localhost/bench \\
+        python -m benchmarks.plans --scale 100k --users 1000
+
+The database is dropped and re-seeded unless --no-seed is given.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.common import configure_app
+from benchmarks.load_test import SCALES, SCENARIOS, benchmark_env, load_users, seed
+
+
+def seq_scans(plan: dict, tables: set) -> list:
+    """Relations among tables read by a Seq Scan node anywhere in plan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found += seq_scans(child, tables)
+    return found
+
+
+async def capture_statements(users: list) -> dict:
+    """Statements run by each route while every scenario is driven once."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app.database import async_engine
+    from app.main import app
+    from app.metrics import current_timings
+
+    statements = defaultdict(dict)
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany or context is None:
+            return
+        if not context.execution_options.get("query_log", True):
+            return
+        timings = current_timings.get()
+        route = timings.route if timings is not None else "(no route)"
+        statements[route].setdefault(statement, parameters)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    rng = random.Random(0)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://plans", timeout=120
+        ) as client:
+            for user in users:
+                response = await client.get(
+                    "/contacts/", params={"limit": 100}, headers=user["headers"]
+                )
+                response.raise_for_status()
+                user["contact_ids"] = [contact["id"] for contact in response.json()]
+
+            for scenario in SCENARIOS:
+                if scenario.prepare is not None:
+                    await scenario.prepare(client, users, 1, rng)
+                response = await scenario.call(client, users[0], rng)
+                if response.status_code >= 400:
+                    print(f"{scenario.name}: HTTP {response.status_code}")
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+        await async_engine.dispose()
+    return statements
+
+
+async def check_plans(statements: dict, min_rows: int) -> int:
+    """Explain every captured statement; returns the number of failures."""
+    from app.database import async_engine
+
+    failures = 0
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(query_log=False)
+        result = await connection.exec_driver_sql(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= $1",
+            (min_rows,),
+        )
+        tables = {name for (name,) in result}
+        print(f"tables with at least {min_rows} rows: {', '.join(sorted(tables))}")
+
+        for route, route_statements in sorted(statements.items()):
+            for statement, parameters in route_statements.items():
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                scanned = seq_scans(plan[0]["Plan"], tables)
+                if scanned:
+                    failures += 1
+                    print(f"FAIL {route}: Seq Scan on {', '.join(scanned)}")
+                    print("     " + " ".join(statement.split()))
+                else:
+                    print(f"ok   {route}: {' '.join(statement.split())[:80]}")
+        await connection.rollback()
+    await async_engine.dispose()
+    return failures
+
+
+async def analyze() -> None:
+    from app.database import async_engine
+
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.exec_driver_sql("ANALYZE")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument(
+        "--scale", default="100k", help="1k, 100k, 1m or a number of contacts"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--no-seed", action="store_true", help="reuse the existing data"
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=10000,
+        help="tables this large must not be read with a sequential scan",
+    )
+    parser.add_argument(
+        "--media-dir", default=os.path.join(tempfile.gettempdir(), "bench-media")
+    )
+    args = parser.parse_args()
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        sys.exit("Pass a PostgreSQL --database-url or set BENCH_DATABASE_URL")
+
+    contacts = SCALES.get(args.scale.lower()) or int(args.scale)
+    configure_app(benchmark_env(args))
+
+    if not args.no_seed:
+        asyncio.run(seed(contacts, args.users, random.Random(args.seed)))
+    asyncio.run(analyze())
+    users = asyncio.run(load_users())
+    if not users:
+        sys.exit("No benchmark users found; run without --no-seed first")
+
+    statements = asyncio.run(capture_statements(users[:1]))
+    failures = asyncio.run(check_plans(statements, args.min_rows))
+    if failures:
+        sys.exit(f"{failures} statements use a sequential scan")
+    print("no sequential scans on large tables")
+
+
+if __name__ == "__main__":
+    main()
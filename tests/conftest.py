@@ -0,0 +1,109 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from uuid import uuid4
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="contacts-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{DATA_DIR}/test.db",
+    DATABASE_REPLICA_URLS="",
+    CACHE_REDIS_URL="",
+    RATE_LIMIT_REDIS_URL="",
+    SECRET_KEY="test-secret",
+    BCRYPT_ROUNDS="4",
+    RATE_LIMIT_MULTIPLIER="1000",
+    PHOTO_STORAGE_BACKEND="local",
+    PHOTO_STORAGE_DIR=os.path.join(DATA_DIR, "media"),
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+CONTACT = {
+    "first_name": "Ivan",
+    "last_name": "Petrenko",
+    "email": "ivan@example.com",
+    "phone": "+380 50 123 45 67",
+    "birthdate": "1990-05-17",
+}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    # Pooled aiosqlite connections belong to this test's event loop.
+    await async_engine.dispose()
+
+
+async def register(client: httpx.AsyncClient, username: str = None) -> dict:
+    """Register and log in a new user; returns the auth headers."""
+    username = username or f"user-{uuid4().hex[:8]}"
+    response = await client.post(
+        "/register/",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "secret",
+        },
+    )
+    assert response.status_code == 201, response.text
+    response = await client.post(
+        "/login/", json={"username": username, "password": "secret"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def headers(client):
+    headers = await register(client)
+    # Warm the principal cache so counted requests only run their own queries.
+    response = await client.get("/users/me/", headers=headers)
+    assert response.status_code == 200
+    return headers
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements sent to the database inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def statement_kinds(statements: list) -> list:
+    """The verb and table of each statement, e.g. "INSERT INTO contacts"."""
+    kinds = []
+    for statement in statements:
+        words = statement.split()
+        if words[0] == "SELECT":
+            table = words[words.index("FROM") + 1]
+            kinds.append(f"SELECT {table}")
+        elif words[0] in ("INSERT", "DELETE"):
+            kinds.append(" ".join(words[:3]))
+        else:
+            kinds.append(" ".join(words[:2]))
+    return kinds
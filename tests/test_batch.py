@@ -0,0 +1,41 @@
+import pytest
+
+from tests.conftest import CONTACT
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "field", ["first_name", "last_name", "email", "phone", "birthdate"]
+)
+async def test_batch_patch_rejects_null_required_fields(client, headers, field):
+    response = await client.post("/contacts/", json=CONTACT, headers=headers)
+    contact = response.json()
+
+    response = await client.patch(
+        "/contacts/batch",
+        json={"items": [{"id": contact["id"], field: None}]},
+        headers=headers,
+    )
+
+    assert response.status_code == 422
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.json()[field] == contact[field]
+
+
+async def test_batch_patch_clears_the_description(client, headers):
+    response = await client.post(
+        "/contacts/", json={**CONTACT, "description": "friend"}, headers=headers
+    )
+    contact = response.json()
+
+    response = await client.patch(
+        "/contacts/batch",
+        json={"items": [{"id": contact["id"], "description": None}]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    [result] = response.json()["results"]
+    assert result["status"] == 200
+    assert result["contact"]["description"] is None
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy.sql import update
+
+from app.database import AsyncSessionLocal
+from app.models import Contact
+from tests.conftest import CONTACT
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_changes_lists_updates_and_deletes_in_order(client, headers):
+    ids = []
+    for name in ("Ivan", "Olena"):
+        response = await client.post(
+            "/contacts/", json={**CONTACT, "first_name": name}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    await client.delete(f"/contacts/{ids[0]}", headers=headers)
+
+    response = await client.get("/contacts/changes", headers=headers)
+
+    assert response.status_code == 200
+    changes = response.json()
+    assert [contact["first_name"] for contact in changes["changed"]] == ["Olena"]
+    assert changes["deleted"] == [ids[0]]
+    assert changes["cursor"] == 3
+    assert not changes["has_more"]
+
+    response = await client.get(
+        "/contacts/changes", params={"since": changes["cursor"]}, headers=headers
+    )
+    assert response.json()["changed"] == response.json()["deleted"] == []
+
+
+async def test_changes_serve_rows_with_null_columns(client, headers):
+    # Rows written before email and birthdate were required may hold NULL.
+    response = await client.post("/contacts/", json=CONTACT, headers=headers)
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(Contact).values(email=None, birthdate=None))
+        await session.commit()
+
+    response = await client.get("/contacts/changes", headers=headers)
+
+    assert response.status_code == 200
+    [contact] = response.json()["changed"]
+    assert contact["email"] is None
+    assert contact["birthdate"] is None
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy.sql import update
+
+from app.database import AsyncSessionLocal
+from app.models import Contact
+from tests.conftest import CONTACT
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def contacts(client, headers):
+    for name in ("Ivan", "Olena"):
+        response = await client.post(
+            "/contacts/", json={**CONTACT, "first_name": name}, headers=headers
+        )
+        assert response.status_code == 201
+    response = await client.get("/contacts/", headers=headers)
+    return response.json()
+
+
+async def test_ndjson_export_matches_the_list(client, headers, contacts):
+    response = await client.get("/contacts/export", headers=headers)
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert [json.loads(line) for line in lines] == contacts
+
+
+async def test_csv_export_matches_the_list(client, headers, contacts):
+    response = await client.get(
+        "/contacts/export", params={"format": "csv"}, headers=headers
+    )
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    expected = [
+        {name: "" if value is None else str(value) for name, value in row.items()}
+        for row in contacts
+    ]
+    assert rows == expected
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+async def test_export_includes_rows_with_null_columns(
+    client, headers, contacts, format
+):
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(Contact).values(email=None, birthdate=None))
+        await session.commit()
+
+    response = await client.get(
+        "/contacts/export", params={"format": format}, headers=headers
+    )
+
+    assert response.status_code == 200
+    # A header row precedes the CSV records.
+    assert len(response.text.splitlines()) == len(contacts) + (format == "csv")
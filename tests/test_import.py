@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import crud
+from tests.conftest import CONTACT
+
+pytestmark = pytest.mark.anyio
+
+
+def ndjson(count: int) -> bytes:
+    lines = (
+        '{"first_name": "Ivan%d", "last_name": "Petrenko", "email": "ivan%d@example.com",'
+        ' "phone": "+380 50 123 45 67", "birthdate": "1990-05-17"}' % (n, n)
+        for n in range(1, count + 1)
+    )
+    return "\n".join(lines).encode()
+
+
+async def import_contacts(client, headers, body, **params):
+    return await client.post(
+        "/contacts/import",
+        params={"format": "ndjson", "batch_size": 2, "mode": "chunked", **params},
+        content=body,
+        headers=headers,
+    )
+
+
+async def first_names(client, headers) -> list:
+    response = await client.get("/contacts/", params={"limit": 100}, headers=headers)
+    assert response.status_code == 200
+    return sorted(contact["first_name"] for contact in response.json())
+
+
+async def test_chunked_import_reports_last_row(client, headers):
+    response = await import_contacts(client, headers, ndjson(5))
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 5, "failed": 0, "last_row": 5, "errors": []}
+
+
+async def test_interrupted_import_can_be_resumed(client, headers, monkeypatch):
+    reserve_change_seqs = crud.reserve_change_seqs
+    calls = 0
+
+    async def fail_third_batch(db, user_id, count):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise OperationalError("UPDATE users", {}, ConnectionError("lost"))
+        return await reserve_change_seqs(db, user_id, count)
+
+    monkeypatch.setattr(crud, "reserve_change_seqs", fail_third_batch)
+    body = ndjson(7)
+    response = await import_contacts(client, headers, body)
+
+    assert response.status_code == 503
+    assert response.headers["X-Imported-Count"] == "4"
+    assert response.headers["X-Last-Row"] == "4"
+    assert "skip=4" in response.json()["detail"]
+    assert await first_names(client, headers) == [f"Ivan{n}" for n in range(1, 5)]
+
+    monkeypatch.setattr(crud, "reserve_change_seqs", reserve_change_seqs)
+    skip = int(response.headers["X-Last-Row"])
+    response = await import_contacts(client, headers, body, skip=skip)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 3
+    assert response.json()["last_row"] == 7
+    assert await first_names(client, headers) == [f"Ivan{n}" for n in range(1, 8)]
+
+
+async def test_atomic_import_commits_nothing_on_failure(client, headers, monkeypatch):
+    async def fail(db, user_id, count):
+        raise OperationalError("UPDATE users", {}, ConnectionError("lost"))
+
+    monkeypatch.setattr(crud, "reserve_change_seqs", fail)
+    with pytest.raises(OperationalError):
+        await import_contacts(client, headers, ndjson(3), mode="atomic")
+
+    monkeypatch.undo()
+    response = await client.post("/contacts/", json=CONTACT, headers=headers)
+    assert response.status_code == 201
+    assert await first_names(client, headers) == ["Ivan"]
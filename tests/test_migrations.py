@@ -0,0 +1,50 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from app.models import Base
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def migration_sql(*command) -> str:
+    """The SQL alembic emits for a PostgreSQL database in offline mode."""
+    result = subprocess.run(
+        [sys.executable, "-m", "alembic", *command, "--sql"],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            "DATABASE_URL": "postgresql+asyncpg://postgres@localhost/contacts",
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def model_indexes() -> set:
+    return {
+        index.name for table in Base.metadata.tables.values() for index in table.indexes
+    }
+
+
+def test_migrations_create_every_model_index_concurrently():
+    sql = migration_sql("upgrade", "head")
+
+    created = re.findall(r"^CREATE INDEX (.*?) ON ", sql, re.MULTILINE)
+    assert created
+    assert all(name.startswith("CONCURRENTLY IF NOT EXISTS ") for name in created)
+    assert {name.split()[-1] for name in created} == model_indexes()
+
+
+def test_downgrade_drops_every_index_concurrently():
+    # The indexes are all added after 6efc8194a1e2, whose unnamed constraints
+    # cannot be dropped in offline mode.
+    sql = migration_sql("downgrade", "head:6efc8194a1e2")
+
+    dropped = re.findall(r"^DROP INDEX (.*?);", sql, re.MULTILINE)
+    assert all(name.startswith("CONCURRENTLY IF EXISTS ") for name in dropped)
+    assert {name.split()[-1] for name in dropped} == model_indexes()
@@ -0,0 +1,40 @@
+import pytest
+
+from tests.conftest import CONTACT
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def contact(client, headers):
+    response = await client.post("/contacts/", json=CONTACT, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.parametrize("field", ["email", "birthdate", "first_name"])
+async def test_patch_rejects_null_required_fields(client, headers, contact, field):
+    response = await client.patch(
+        f"/contacts/{contact['id']}", json={field: None}, headers=headers
+    )
+
+    assert response.status_code == 422
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.json()[field] == contact[field]
+    response = await client.get("/contacts/changes", headers=headers)
+    assert response.status_code == 200
+
+
+async def test_patch_writes_only_the_given_fields(client, headers, contact):
+    response = await client.patch(
+        f"/contacts/{contact['id']}",
+        json={"email": "new@example.com", "description": None},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        **contact,
+        "email": "new@example.com",
+        "description": None,
+    }
@@ -0,0 +1,120 @@
+import asyncio
+from uuid import UUID
+
+import pytest
+from sqlalchemy.sql import select
+
+from app import auth, cache, crud
+from app.auth import PrincipalCache, principal_cache
+from app.cache import MemoryBackend
+from app.database import AsyncSessionLocal
+from app.models import User
+from tests.conftest import count_queries, register, statement_kinds
+
+pytestmark = pytest.mark.anyio
+
+
+async def current_user_id(client, headers) -> UUID:
+    response = await client.get("/users/me/", headers=headers)
+    assert response.status_code == 200
+    return UUID(response.json()["id"])
+
+
+async def pending_invalidations():
+    await asyncio.gather(*auth._pending_invalidations)
+
+
+async def test_cached_principal_skips_the_users_query(client):
+    headers = await register(client)
+
+    with count_queries() as statements:
+        await client.get("/users/me/", headers=headers)
+    assert statement_kinds(statements) == ["SELECT users"]
+
+    hits = principal_cache.hits
+    with count_queries() as statements:
+        response = await client.get("/users/me/", headers=headers)
+    assert response.status_code == 200
+    assert statements == []
+    assert principal_cache.hits == hits + 1
+
+
+async def test_cached_principal_has_no_password(client, headers):
+    user_id = await current_user_id(client, headers)
+    user = await principal_cache.get(user_id)
+    assert user.id == user_id
+    assert user.password is None
+
+
+async def test_orm_update_invalidates_on_commit(client, headers):
+    user_id = await current_user_id(client, headers)
+
+    async with AsyncSessionLocal() as session:
+        user = await session.get(User, user_id)
+        user.first_name = "Changed"
+        await session.commit()
+    await pending_invalidations()
+
+    assert await principal_cache.get(user_id) is None
+    response = await client.get("/users/me/", headers=headers)
+    assert response.json()["first_name"] == "Changed"
+
+
+async def test_core_update_invalidates_on_commit(client, headers):
+    user_id = await current_user_id(client, headers)
+
+    async with AsyncSessionLocal() as session:
+        await crud.update_user_password(session, user_id, "new-hash")
+        await session.commit()
+    await pending_invalidations()
+
+    assert await principal_cache.get(user_id) is None
+
+
+async def test_rollback_keeps_the_cached_principal(client, headers):
+    user_id = await current_user_id(client, headers)
+
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalar()
+        user.first_name = "Discarded"
+        await session.flush()
+        await session.rollback()
+    await pending_invalidations()
+
+    assert (await principal_cache.get(user_id)).first_name is None
+
+
+async def test_principal_cache_expires(client, headers, monkeypatch):
+    user_id = await current_user_id(client, headers)
+    user = await principal_cache.get(user_id)
+    principals = PrincipalCache(MemoryBackend(), ttl=60)
+    await principals.set(user)
+
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 61)
+
+    assert await principals.get(user_id) is None
+    assert principals.stats()["misses"] == 1
+
+
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    await backend.set("a", b"1", 60)
+    await backend.set("b", b"2", 60)
+    await backend.get("a")
+    await backend.set("c", b"3", 60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert await backend.get("c") == b"3"
+
+
+async def test_memory_backend_bounds_total_size():
+    backend = MemoryBackend(max_entries=10, max_bytes=4)
+    await backend.set("a", b"12", 60)
+    await backend.set("b", b"34", 60)
+    await backend.set("c", b"5", 60)
+
+    assert len(backend) == 2
+    assert backend.size_bytes == 3
+    assert await backend.get("a") is None
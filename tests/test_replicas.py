@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import database
+from app.database import (
+    Base,
+    ReplicaSet,
+    async_engine,
+    mark_write,
+    read_session,
+    recent_writers,
+)
+from tests.conftest import CONTACT, DATA_DIR, count_queries
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replicas(monkeypatch):
+    """Two replicas with the schema but none of the primary's rows."""
+    replica_set = ReplicaSet(
+        [f"sqlite+aiosqlite:///{DATA_DIR}/replica-{n}.db" for n in range(2)]
+    )
+    for engine in replica_set.engines:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(database, "replica_set", replica_set)
+    yield replica_set
+    for engine in replica_set.engines:
+        await engine.dispose()
+
+
+async def bound_engine(user_id=None):
+    async with read_session(user_id) as session:
+        return session.bind
+
+
+async def test_reads_use_the_primary_without_replicas():
+    assert await bound_engine(uuid4()) is async_engine
+
+
+async def test_replicas_are_picked_round_robin(replicas):
+    engines = [await bound_engine() for _ in range(4)]
+    assert engines == replicas.engines * 2
+
+
+async def test_reads_stay_on_the_primary_after_a_write(replicas):
+    writer, other = uuid4(), uuid4()
+    await mark_write(writer)
+
+    assert await bound_engine(writer) is async_engine
+    assert await bound_engine(other) in replicas.engines
+
+    await recent_writers.delete(str(writer))
+    assert await bound_engine(writer) in replicas.engines
+
+
+async def test_unhealthy_replicas_are_skipped(replicas):
+    replicas.mark_down(0)
+    assert {await bound_engine() for _ in range(3)} == {replicas.engines[1]}
+
+    replicas.mark_down(1)
+    assert await bound_engine() is async_engine
+
+    await replicas.check_health()
+    assert replicas.healthy == [True, True]
+
+
+async def test_lost_replica_connection_marks_it_down(replicas):
+    with pytest.raises(OperationalError):
+        async with read_session() as session:
+            index = replicas.engines.index(session.bind)
+            raise OperationalError("SELECT 1", {}, ConnectionError("lost"))
+
+    assert not replicas.healthy[index]
+
+
+async def test_get_endpoints_read_from_a_replica(client, headers, replicas):
+    response = await client.post("/contacts/", json=CONTACT, headers=headers)
+    assert response.status_code == 201
+    user_id = (await client.get("/users/me/", headers=headers)).json()["id"]
+
+    # Within the read-your-writes window the user's reads go to the primary.
+    response = await client.get(
+        "/contacts/search", params={"query": "ivan"}, headers=headers
+    )
+    assert [contact["first_name"] for contact in response.json()] == ["Ivan"]
+
+    # Afterwards they go to a replica, which has not caught up here.
+    await recent_writers.delete(user_id)
+    with count_queries() as primary_statements:
+        response = await client.get(
+            "/contacts/search", params={"query": "ivan"}, headers=headers
+        )
+    assert response.status_code == 200
+    assert response.json() == []
+    assert primary_statements == []
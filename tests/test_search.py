@@ -0,0 +1,90 @@
+import pytest
+
+from app.search import build_prefix_tsquery
+from tests.conftest import CONTACT, register
+
+pytestmark = pytest.mark.anyio
+
+CONTACTS = [
+    {**CONTACT, "first_name": "Ivan", "last_name": "Petrenko"},
+    {
+        **CONTACT,
+        "first_name": "Olena",
+        "last_name": "Ivanova",
+        "email": "olena@mail.ua",
+        "phone": "+380 67 765 43 21",
+    },
+    {
+        **CONTACT,
+        "first_name": "Taras",
+        "last_name": "Shevchenko",
+        "email": "taras@kobzar.ua",
+        "phone": "+380 93 000 11 22",
+    },
+]
+
+
+@pytest.fixture
+async def contacts(client, headers):
+    for contact in CONTACTS:
+        response = await client.post("/contacts/", json=contact, headers=headers)
+        assert response.status_code == 201
+
+
+async def search(client, headers, query, **params) -> list:
+    response = await client.get(
+        "/contacts/search", params={"query": query, **params}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return [contact["first_name"] for contact in response.json()]
+
+
+# Terms match word prefixes, as with the prefix tsquery on PostgreSQL: an
+# email address is one word there, and "+380" keeps its sign.
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("ivan", ["Olena", "Ivan"]),
+        ("PETR", ["Ivan"]),
+        ("shev", ["Taras"]),
+        ("chenko", []),
+        ("taras@", ["Taras"]),
+        ("kobzar", []),
+        ("765", ["Olena"]),
+        ("+380", ["Olena", "Ivan", "Taras"]),
+        ("ivan olena", ["Olena"]),
+        ("nobody", []),
+    ],
+)
+async def test_search_matches_names_email_and_phone(
+    client, headers, contacts, query, expected
+):
+    assert await search(client, headers, query) == expected
+
+
+async def test_search_limit(client, headers, contacts):
+    assert len(await search(client, headers, "+380", limit=2)) == 2
+    response = await client.get(
+        "/contacts/search", params={"query": "+380", "limit": 0}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+async def test_blank_search_returns_nothing(client, headers, contacts):
+    assert await search(client, headers, "   ") == []
+
+
+async def test_search_only_finds_own_contacts(client, headers, contacts):
+    other = await register(client)
+    assert await search(client, other, "ivan") == []
+
+
+async def test_search_treats_wildcards_literally(client, headers, contacts):
+    assert await search(client, headers, "%") == []
+    assert await search(client, headers, "_") == []
+
+
+def test_prefix_tsquery_quotes_terms():
+    assert build_prefix_tsquery("Ivan +380") == "'ivan':* & '+380':*"
+    assert build_prefix_tsquery("o'neil") == "'o''neil':*"
+    assert build_prefix_tsquery("a & !b") == "'a':* & '&':* & '!b':*"
@@ -0,0 +1,131 @@
+from uuid import uuid4
+
+import pytest
+
+from tests.conftest import CONTACT, count_queries, register, statement_kinds
+
+pytestmark = pytest.mark.anyio
+
+# SQLite reserves the owner's change_seq with its own UPDATE users; on
+# PostgreSQL that UPDATE is a CTE of the contact write itself.
+
+
+async def create_contact(client, headers, **values) -> dict:
+    response = await client.post(
+        "/contacts/", json={**CONTACT, **values}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_register_inserts_the_user_with_returning(client):
+    with count_queries() as statements:
+        response = await client.post(
+            "/register/",
+            json={"username": "ivan", "email": "ivan@example.com", "password": "pw"},
+        )
+
+    assert response.status_code == 201
+    assert response.json()["user"]["username"] == "ivan"
+    assert statement_kinds(statements) == ["SELECT users", "INSERT INTO users"]
+    assert "RETURNING" in statements[1]
+
+
+async def test_register_conflict_writes_nothing(client):
+    await register(client, "ivan")
+    with count_queries() as statements:
+        response = await client.post(
+            "/register/",
+            json={"username": "ivan", "email": "other@example.com", "password": "pw"},
+        )
+
+    assert response.status_code == 409
+    assert statement_kinds(statements) == ["SELECT users"]
+
+
+async def test_create_contact_is_one_insert(client, headers):
+    with count_queries() as statements:
+        response = await client.post("/contacts/", json=CONTACT, headers=headers)
+
+    assert response.status_code == 201
+    assert response.json()["first_name"] == "Ivan"
+    assert statement_kinds(statements) == ["UPDATE users", "INSERT INTO contacts"]
+    assert "RETURNING" in statements[1]
+
+
+async def test_update_contact_is_one_update(client, headers):
+    contact = await create_contact(client, headers)
+
+    with count_queries() as statements:
+        response = await client.put(
+            f"/contacts/{contact['id']}",
+            json={**CONTACT, "first_name": "Petro"},
+            headers=headers,
+        )
+
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Petro"
+    assert statement_kinds(statements) == ["UPDATE users", "UPDATE contacts"]
+    assert "RETURNING" in statements[1]
+
+
+async def test_delete_contact_is_one_delete(client, headers):
+    contact = await create_contact(client, headers)
+
+    with count_queries() as statements:
+        response = await client.delete(f"/contacts/{contact['id']}", headers=headers)
+
+    assert response.status_code == 204
+    assert statement_kinds(statements) == [
+        "DELETE FROM contacts",
+        "UPDATE users",
+        "INSERT INTO contact_tombstones",
+    ]
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_writes_are_scoped_to_the_owner(client, headers):
+    contact = await create_contact(client, headers)
+    other = await register(client)
+    await client.get("/users/me/", headers=other)
+
+    with count_queries() as statements:
+        update = await client.put(
+            f"/contacts/{contact['id']}", json=CONTACT, headers=other
+        )
+        delete = await client.delete(f"/contacts/{contact['id']}", headers=other)
+
+    assert update.status_code == 404
+    assert delete.status_code == 404
+    assert "SELECT contacts" not in statement_kinds(statements)
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.status_code == 200
+
+
+async def test_missing_contact_is_404(client, headers):
+    response = await client.put(f"/contacts/{uuid4()}", json=CONTACT, headers=headers)
+    assert response.status_code == 404
+    response = await client.delete(f"/contacts/{uuid4()}", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_stale_if_match_is_412(client, headers):
+    contact = await create_contact(client, headers)
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    etag = response.headers["ETag"]
+    await client.put(
+        f"/contacts/{contact['id']}",
+        json={**CONTACT, "first_name": "Petro"},
+        headers=headers,
+    )
+
+    response = await client.put(
+        f"/contacts/{contact['id']}",
+        json={**CONTACT, "first_name": "Stale"},
+        headers={**headers, "If-Match": etag},
+    )
+
+    assert response.status_code == 412
+    response = await client.get(f"/contacts/{contact['id']}", headers=headers)
+    assert response.json()["first_name"] == "Petro"